@@ -35,7 +35,12 @@ def cmd_discover(
         from leizilla.storage import DuckDBStorage
 
         db = DuckDBStorage()
-        added = run_discovery(ente, db, fonte=fonte)
+        try:
+            added = run_discovery(ente, db, fonte=fonte)
+        finally:
+            # Fechar já: o `pipeline` abre o mesmo arquivo read-only no export, e
+            # o DuckDB recusa isso com uma conexão read-write viva no processo.
+            db.close()
         echo(f"Descoberta concluída. Adicionados/ignorados recursos: {added} total.")
     except Exception as e:
         echo(f"Erro: {e}")
@@ -129,7 +134,12 @@ def cmd_harvest(
         db = DuckDBStorage()
         pub = InternetArchivePublisher()
 
-        stats = harvest_pending_resources(db, pub, limit=limit, ente=ente, tipo=tipo)
+        try:
+            stats = harvest_pending_resources(
+                db, pub, limit=limit, ente=ente, tipo=tipo
+            )
+        finally:
+            db.close()  # ver cmd_discover
         echo("Colheita concluída:")
         echo(f"  Sucesso: {stats['success']}")
         echo(f"  Falhas: {stats['failed']}")
@@ -278,6 +288,7 @@ def cmd_fetch_ocr(
                 success += 1
             else:
                 echo("  Não foi possível obter o OCR do Internet Archive.")
+                db.touch_lei(lei_id)
                 failed += 1
 
         echo(f"Busca de OCR concluída: {success} com sucesso, {failed} falhas.")
@@ -301,17 +312,14 @@ def cmd_download(
         async def run() -> None:
             crawler = LeisCrawler(crawler_type="simple")
             db = DuckDBStorage()
-            laws = db.search_leis(ente=ente, limit=limit)
-            to_download = [law for law in laws if not law.get("url_pdf_ia")]
+            to_download = db.get_leis_pending_download(ente=ente, limit=limit)
 
             if not to_download:
                 echo("Todos os PDFs já foram baixados")
                 return
 
             downloaded = 0
-            for law in to_download[:limit]:
-                if not law.get("url_original"):
-                    continue
+            for law in to_download:
                 import tempfile as _tmp
 
                 with _tmp.NamedTemporaryFile(suffix=".pdf", delete=False) as f:
@@ -322,6 +330,7 @@ def cmd_download(
                     downloaded += 1
                     echo(f"  Baixou: {law.get('titulo', 'N/A')}")
                 else:
+                    db.touch_lei(law["id"])
                     echo(f"  Falha: {law.get('titulo', 'N/A')}")
 
             echo(f"Baixou {downloaded} PDFs")
@@ -345,12 +354,7 @@ def cmd_upload(
 
         publisher = InternetArchivePublisher()
         db = DuckDBStorage()
-        laws = db.search_leis(limit=limit * 2)
-        to_upload = [
-            law
-            for law in laws
-            if law.get("local_pdf_path") and not law.get("url_pdf_ia")
-        ]
+        to_upload = db.get_leis_pending_upload(limit=limit)
 
         if not to_upload:
             echo("Todos os PDFs já foram enviados para IA")
@@ -360,10 +364,11 @@ def cmd_upload(
         # Índice acumulado por item de range no lote (evita lost-update do
         # index.csv entre uploads ao mesmo item — IA não tem read-after-write).
         index_cache: Dict[str, str] = {}
-        for law in to_upload[:limit]:
+        for law in to_upload:
             try:
                 pdf_path = Path(law["local_pdf_path"])
                 if not pdf_path.exists():
+                    db.touch_lei(law["id"])
                     continue
                 pdf_bytes = pdf_path.read_bytes()
                 result = publisher.upload_raw(
@@ -378,8 +383,10 @@ def cmd_upload(
                     uploaded += 1
                     echo(f"  Upload: {law.get('titulo', 'N/A')}")
                 else:
+                    db.touch_lei(law["id"])
                     echo(f"  Falha: {law.get('titulo', 'N/A')}")
             except Exception as e:
+                db.touch_lei(law["id"])
                 echo(f"  Erro em {law.get('titulo', 'N/A')}: {e}")
 
         echo(f"Fez upload de {uploaded} PDFs")
@@ -798,6 +805,26 @@ def cmd_consolidate(
         raise typer.Exit(1)
 
 
+@app.command("ingest")
+def cmd_ingest(
+    path: Path = typer.Argument(..., help="JSONL de leis (um objeto por linha)"),
+) -> None:
+    """Carregar no banco local um JSONL de leis gerado por um conector."""
+    echo(f"Carregando {path}...")
+    try:
+        from leizilla.storage import DuckDBStorage
+
+        db = DuckDBStorage()
+        try:
+            total = db.ingest_jsonl(path)
+        finally:
+            db.close()
+        echo(f"Carregadas {total} linhas de {path}")
+    except Exception as e:
+        echo(f"Erro: {e}")
+        raise typer.Exit(1)
+
+
 @app.command("export")
 def cmd_export(
     ente: str = typer.Option("ro", help="Ente federativo"),
@@ -838,8 +865,11 @@ def cmd_search(
     try:
         from leizilla.storage import DuckDBStorage
 
-        db = DuckDBStorage()
-        laws = db.search_leis(ente=ente, ano=year, texto=text, limit=limit)
+        db = DuckDBStorage(read_only=True)
+        try:
+            laws = db.search_leis(ente=ente, ano=year, texto=text, limit=limit)
+        finally:
+            db.close()
 
         if not laws:
             echo("Nenhuma lei encontrada")
@@ -1366,11 +1396,13 @@ def cmd_pipeline(
 
     try:
         echo("\nEtapa 1/3: Descobrir leis (manifesto)")
-        cmd_discover(ente=ente)
+        # Chamadas diretas não passam pelo typer: toda opção vai explícita, ou o
+        # default seria o próprio OptionInfo.
+        cmd_discover(ente=ente, fonte=None)
         echo("\nEtapa 2/3: Colher leis descobertas")
-        cmd_harvest(ente=ente, limit=limit)
+        cmd_harvest(ente=ente, tipo=None, limit=limit)
         echo("\nEtapa 3/3: Exportar dataset")
-        cmd_export(ente=ente, year=None)
+        cmd_export(ente=ente, year=None, format="parquet")
         echo("\nPipeline concluído!")
     except Exception as e:
         echo(f"Pipeline falhou: {e}")
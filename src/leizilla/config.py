@@ -9,6 +9,11 @@ DATA_DIR = Path(os.getenv("DATA_DIR", str(PROJECT_ROOT / "data")))
 TEMP_DIR = DATA_DIR / "temp"
 
 DUCKDB_PATH = Path(os.getenv("DUCKDB_PATH", str(DATA_DIR / "leizilla.duckdb")))
+# Ajuste do motor; vazio = default do DuckDB (threads = núcleos, memória = 80% RAM).
+DUCKDB_THREADS: Optional[int] = (
+    int(os.environ["DUCKDB_THREADS"]) if os.getenv("DUCKDB_THREADS") else None
+)
+DUCKDB_MEMORY_LIMIT: Optional[str] = os.getenv("DUCKDB_MEMORY_LIMIT") or None
 
 IA_ACCESS_KEY: Optional[str] = os.getenv("IA_ACCESS_KEY") or os.getenv(
     "IAS3_ACCESS_KEY"
@@ -22,6 +27,12 @@ GEMINI_API_KEY: Optional[str] = os.getenv("GEMINI_API_KEY") or os.getenv(
 )
 LLM_MODEL: Optional[str] = os.getenv("LLM_MODEL")
 
+# Teto por tentativa de `ia upload`: a base mais o tempo de enviar os arquivos
+# à vazão mínima aceitável (bytes/s) — bundles e datasets grandes ganham prazo
+# proporcional, e só um `ia` realmente travado é morto.
+IA_UPLOAD_TIMEOUT_S = float(os.getenv("IA_UPLOAD_TIMEOUT_S", "600"))
+IA_UPLOAD_MIN_RATE = int(os.getenv("IA_UPLOAD_MIN_RATE", str(64 * 1024)))
+
 CRAWLER_DELAY = int(os.getenv("CRAWLER_DELAY", "2000"))
 CRAWLER_RETRIES = int(os.getenv("CRAWLER_RETRIES", "3"))
 CRAWLER_TIMEOUT = int(os.getenv("CRAWLER_TIMEOUT", "30000"))
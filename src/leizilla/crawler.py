@@ -142,30 +142,46 @@ class LeisCrawler:
         self,
         start_coddoc: int = 1,
         end_coddoc: int = 10,
+        browser: Optional[Browser] = None,
     ) -> List[Dict[str, Any]]:
         """Descobre leis no portal da Assembleia Legislativa de Rondônia.
 
         Requer crawler_type="playwright" — o portal ALRO usa JavaScript para
         renderizar o conteúdo. Modo "simple" (requests+BS4) não implementado.
+
+        `browser`: um Chromium já aberto, reaproveitado entre chamadas (só uma
+        página nova por faixa; quem o abriu o fecha). Sem ele, cada chamada
+        lança e fecha o seu (~1–2 s).
         """
         if self.crawler_type != "playwright":
             raise NotImplementedError(
                 f"discover_rondonia_laws requer crawler_type='playwright'; "
                 f"'{self.crawler_type}' não implementado para o portal ALRO."
             )
-        laws = []
-        base_url = "https://www.al.ro.leg.br"
-
+        if browser is not None:
+            return await self._discover_rondonia(browser, start_coddoc, end_coddoc)
         async with async_playwright() as playwright:
-            browser: Browser = await playwright.chromium.launch(headless=True)
-            page: Page = await browser.new_page()
+            browser = await playwright.chromium.launch(headless=True)
+            try:
+                return await self._discover_rondonia(browser, start_coddoc, end_coddoc)
+            finally:
+                await browser.close()
 
+    async def _discover_rondonia(
+        self, browser: Browser, start_coddoc: int, end_coddoc: int
+    ) -> List[Dict[str, Any]]:
+        laws = []
+        base_url = "https://www.al.ro.leg.br"
+        page: Page = await browser.new_page()
+        try:
             for coddoc in range(start_coddoc, end_coddoc + 1):
                 try:
                     url = f"{base_url}/legislacao/leis/{coddoc}"
                     await page.goto(url, timeout=self.timeout_ms)
                     await page.wait_for_load_state("networkidle")
 
+                    # Seletores CSS puros: vão direto ao querySelector do
+                    # navegador, sem os motores role=/text=/xpath do Playwright.
                     title_el = await page.query_selector("h1, h2, .title")
                     title = await title_el.inner_text() if title_el else f"Lei {coddoc}"
 
@@ -212,8 +228,8 @@ class LeisCrawler:
                         "coddoc %d skipped: %s", coddoc, exc
                     )
                     continue
-
-            await browser.close()
+        finally:
+            await page.close()
 
         return laws
 
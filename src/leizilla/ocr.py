@@ -15,23 +15,36 @@ def clean_ocr_text(text: str) -> str:
     return cleaned.strip()
 
 
+# Diacríticos latinos (U+0300–U+036F) que o NFKD separa de "ç", "ã", "é"...;
+# qualquer outra marca combinante cai no filtro exato por caractere.
+_LATIN_COMBINING_RE = re.compile("[\u0300-\u036f]+")
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9 ]+")
+# Bytes ASCII removidos no caminho rápido: tudo exceto a-z, 0-9 e espaço.
+_ASCII_DROP = bytes(
+    b for b in range(128) if not (chr(b).isdigit() or "a" <= chr(b) <= "z" or b == 32)
+)
+
+
 def normalize_text(text: str) -> str:
     """Normaliza texto para a coluna texto_normalizado (busca rápida).
 
     Remove acentos, converte para minúsculo, remove pontuação e excesso de espaços.
+    Texto jurídico em português vira ASCII após tirar os diacríticos latinos;
+    daí em diante tudo roda em C (`str.split`, `bytes.translate`) em vez de
+    um filtro Python por caractere e duas passadas de regex.
     """
     if not text:
         return ""
     # Remove acentos e diacríticos
-    normalized = unicodedata.normalize("NFKD", text)
-    normalized = "".join([c for c in normalized if not unicodedata.combining(c)])
-    # Minúsculo
-    normalized = normalized.lower()
-    # Substituir quebras de linha e múltiplos espaços por um espaço simples
-    normalized = re.sub(r"\s+", " ", normalized)
-    # Remover caracteres especiais mantendo apenas letras, números e espaços simples
-    normalized = re.sub(r"[^a-z0-9\s]", "", normalized)
-    return normalized.strip()
+    normalized = _LATIN_COMBINING_RE.sub("", unicodedata.normalize("NFKD", text))
+    if not normalized.isascii():
+        normalized = "".join(c for c in normalized if not unicodedata.combining(c))
+    # Minúsculo; quebras de linha e espaços múltiplos viram um espaço simples
+    normalized = " ".join(normalized.lower().split())
+    # Remover caracteres especiais mantendo apenas letras, números e espaços
+    if normalized.isascii():
+        return normalized.encode("ascii").translate(None, _ASCII_DROP).decode().strip()
+    return _NON_ALNUM_RE.sub("", normalized).strip()
 
 
 def fetch_and_clean_ocr(ia_id: str) -> Optional[str]:
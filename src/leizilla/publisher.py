@@ -598,6 +598,23 @@ _IA_UPLOAD_MAX_DELAY_S = 60.0
 _IA_RATE_LIMIT_KEY = "https://archive.org/"  # host fixo p/ make_rate_limiter (ADR-0008)
 
 
+def _ia_upload_timeout(args: list[str]) -> float:
+    """Teto de uma tentativa de ``ia upload``, proporcional ao payload.
+
+    Os arquivos são os posicionais depois do identifier (``ia upload <id>
+    <arquivos...> --metadata ...``): ``config.IA_UPLOAD_TIMEOUT_S`` mais o
+    tempo de enviá-los a ``config.IA_UPLOAD_MIN_RATE`` bytes/s.
+    """
+    payload = 0
+    for arg in args[3:]:
+        if arg.startswith("-"):
+            break
+        path = Path(arg)
+        if path.is_file():
+            payload += path.stat().st_size
+    return config.IA_UPLOAD_TIMEOUT_S + payload / config.IA_UPLOAD_MIN_RATE
+
+
 class InternetArchivePublisher:
     """Upload para IA e geração de datasets Parquet."""
 
@@ -628,37 +645,56 @@ class InternetArchivePublisher:
         que o backoff exponencial já espaça as tentativas da MESMA chamada;
         pacear os dois ao mesmo tempo só somaria esperas redundantes.
 
+        Cada tentativa tem teto de ``_ia_upload_timeout`` — ``subprocess.run``
+        mata o ``ia`` travado (conexão pendurada sem erro) e a tentativa conta
+        como transiente, igual a um timeout reportado no stderr. Esgotadas as
+        tentativas, vira ``CalledProcessError`` para os callers (que já tratam
+        esse caso como ``success: False``) não precisarem de um ramo novo.
+
         O ``ia.ini`` temporário (credenciais em texto plano) é removido no
         ``finally`` assim que esta chamada termina — não sobrevive além dela.
         """
         self._upload_rate_limiter(_IA_RATE_LIMIT_KEY)
         env = _ia_subprocess_env(self.access_key, self.secret_key)
         cfg_path = env.get("IA_CONFIG_FILE") if env else None
+        timeout = _ia_upload_timeout(args)
         try:
             for attempt in range(1, _IA_UPLOAD_MAX_ATTEMPTS + 1):
                 try:
                     return subprocess.run(
-                        args, capture_output=True, text=True, check=True, env=env
+                        args,
+                        capture_output=True,
+                        text=True,
+                        check=True,
+                        env=env,
+                        timeout=timeout,
                     )
+                except subprocess.TimeoutExpired as e:
+                    stderr = f"ia upload: timeout após {e.timeout:.0f}s"
+                    if attempt == _IA_UPLOAD_MAX_ATTEMPTS:
+                        raise subprocess.CalledProcessError(
+                            -1, args, stderr=stderr
+                        ) from e
                 except subprocess.CalledProcessError as e:
                     if (
                         attempt == _IA_UPLOAD_MAX_ATTEMPTS
                         or not _RETRYABLE_IA_ERROR_RE.search(e.stderr or "")
                     ):
                         raise
-                    delay = min(
-                        _IA_UPLOAD_MAX_DELAY_S,
-                        _IA_UPLOAD_BASE_DELAY_S * (2 ** (attempt - 1)),
-                    )
-                    delay += random.uniform(0, delay * 0.25)  # jitter
-                    logger.warning(
-                        "ia upload: erro transiente (tentativa %d/%d), retry em %.1fs: %s",
-                        attempt,
-                        _IA_UPLOAD_MAX_ATTEMPTS,
-                        delay,
-                        (e.stderr or "").strip()[:200],
-                    )
-                    time.sleep(delay)
+                    stderr = e.stderr or ""
+                delay = min(
+                    _IA_UPLOAD_MAX_DELAY_S,
+                    _IA_UPLOAD_BASE_DELAY_S * (2 ** (attempt - 1)),
+                )
+                delay += random.uniform(0, delay * 0.25)  # jitter
+                logger.warning(
+                    "ia upload: erro transiente (tentativa %d/%d), retry em %.1fs: %s",
+                    attempt,
+                    _IA_UPLOAD_MAX_ATTEMPTS,
+                    delay,
+                    stderr.strip()[:200],
+                )
+                time.sleep(delay)
             raise AssertionError("unreachable — loop always returns or raises")
         finally:
             if cfg_path is not None:
@@ -1393,7 +1429,9 @@ class InternetArchivePublisher:
         filename += ".parquet"
         output_path = output_dir / filename
 
-        db = storage_module.DuckDBStorage()
-        db.export_parquet(output_path, ente=ente, ano=ano)
-        db.close()
+        db = storage_module.DuckDBStorage(read_only=True)
+        try:
+            db.export_parquet(output_path, ente=ente, ano=ano)
+        finally:
+            db.close()
         return output_path
@@ -2,30 +2,354 @@
 
 import hashlib
 import json
-from datetime import datetime
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
 
 import duckdb
 
 from leizilla import config
 
+# Linhas por fetchmany nos caminhos de streaming — um vetor DuckDB (2048) é o
+# teto útil; acima disso o lote só cresce em objetos Python.
+FETCH_BATCH_SIZE = 1024
+
+# Linhas por NDJSON de staging em insert_leis_bulk: acima de ~10k o ganho por
+# linha some e o arquivo temporário e a temp table só crescem.
+BULK_CHUNK_SIZE = 10_000
+
+# SQL montado por formato de linha (colunas do dict, colunas alteradas) no
+# cache de statements; os formatos vêm do chamador, então o LRU tem teto.
+SQL_CACHE_SIZE = 256
+
+# Leis mantidas no LRU de get_lei (por instância). Páginas de lei quentes são
+# servidas sem ida ao DuckDB; qualquer escrita esvazia o cache.
+LEI_CACHE_SIZE = 512
+
+
+def _json_default(obj: object) -> str:
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"not serializable: {type(obj)}")
+
+
+# Encoder reutilizado por linha: separadores compactos e UTF-8 cru (sem \uXXXX
+# para cada acento das ementas) — menos bytes a gerar e a gravar em `metadados`
+# e nos NDJSON de carga em lote.
+_JSON_ENCODER = json.JSONEncoder(
+    ensure_ascii=False, separators=(",", ":"), default=_json_default
+)
+
+
+# Colunas de `leis` no índice FTS: só escrita que as toca (ou linha nova)
+# obriga a refazer o índice.
+_FTS_FIELDS = ("titulo", "texto_normalizado")
+
+
+# Versão de `leis` gravada junto do índice FTS: com ela uma conexão read-only,
+# que não pode reconstruir o índice, sabe se ele ainda vale. É uma impressão
+# digital do conteúdo indexado, não de `updated_at` — o chamador controla o
+# carimbo (`now=`), e uma escrita com data antiga passaria despercebida.
+_LEIS_VERSAO_SQL = (
+    "SELECT COUNT(*) AS linhas, "
+    f"SUM(hash(id, {', '.join(_FTS_FIELDS)})) AS conteudo FROM leis"
+)
+
+
+# Total de caracteres de texto_completo num lote a partir do qual o sha256 vai
+# para um pool de threads: o hashlib solta o GIL em buffers > 2 KiB, então
+# núcleos extras hasheiam em paralelo. Abaixo disso o custo do pool
+# (~15 µs por tarefa) supera o do próprio hash.
+_HASH_POOL_MIN_CHARS = 8 << 20
+
+
+def _prepare_lei_row(lei_data: Dict[str, Any]) -> Dict[str, Any]:
+    """Cópia da linha pronta para gravar.
+
+    `metadados` fica como objeto Python (texto JSON vindo do chamador é
+    decodificado): o lote grava o objeto aninhado no NDJSON e o cast para
+    JSON do DuckDB o serializa, sem `dumps` por linha nem texto escapado
+    dentro de texto. `_encode_json` cobre os caminhos que gravam direto.
+    """
+    row = dict(lei_data)
+    row.pop("updated_at", None)
+    if row.get("texto_completo") and not row.get("texto_normalizado"):
+        # Import tardio: ocr puxa o parser (~40 ms), e quem só lê não precisa.
+        from leizilla.ocr import normalize_text
+
+        row["texto_normalizado"] = normalize_text(row["texto_completo"])
+    if isinstance(row.get("metadados"), str):
+        row["metadados"] = json.loads(row["metadados"])
+    return row
+
+
+def _encode_json(value: Any) -> Any:
+    """Texto JSON compacto, como o DuckDB guarda, para objetos Python."""
+    if value is None or isinstance(value, str):
+        return value
+    return _JSON_ENCODER.encode(value)
+
+
+def _hash_texto(texto: str) -> str:
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+
+def _stamp_hashes(rows: List[Dict[str, Any]]) -> None:
+    """Preenche `hash_conteudo` das linhas com `texto_completo`."""
+    com_texto = [row for row in rows if row.get("texto_completo")]
+    textos = [row["texto_completo"] for row in com_texto]
+    workers = min(8, os.cpu_count() or 1)
+    if workers > 1 and sum(map(len, textos)) >= _HASH_POOL_MIN_CHARS:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            hashes = list(pool.map(_hash_texto, textos))
+    else:
+        hashes = [_hash_texto(texto) for texto in textos]
+    for row, digest in zip(com_texto, hashes):
+        row["hash_conteudo"] = digest
+
+
+def _ts_sql(now: Optional[datetime]) -> Tuple[str, List[Any]]:
+    """SQL e parâmetros de um carimbo de tempo: `now` do chamador ou o do DuckDB.
+
+    CURRENT_TIMESTAMP é o início da transação, então todas as linhas de um
+    lote recebem o mesmo instante sem relógio nem parâmetro vindos do Python.
+    """
+    if now is None:
+        return "CURRENT_TIMESTAMP", []
+    return "?", [now]
+
+
+def _duckdb_config() -> Dict[str, Any]:
+    """Configuração do motor (DUCKDB_THREADS / DUCKDB_MEMORY_LIMIT no env).
+
+    O spill de operadores maiores que a memória (sort/agregação do export e do
+    get_stats) vai para TEMP_DIR, junto dos demais temporários do projeto.
+    """
+    cfg: Dict[str, Any] = {"temp_directory": str(config.TEMP_DIR / "duckdb")}
+    if config.DUCKDB_THREADS:
+        cfg["threads"] = config.DUCKDB_THREADS
+    if config.DUCKDB_MEMORY_LIMIT:
+        cfg["memory_limit"] = config.DUCKDB_MEMORY_LIMIT
+    return cfg
+
+
+def _normalize_query(texto: str) -> str:
+    """Termo de busca na forma de `texto_normalizado` (`ocr.normalize_text`).
+
+    Sem isso "orçamento" nunca casaria com o "orcamento" gravado. Curingas
+    LIKE (`%`, `_`) são preservados: só os trechos entre eles são normalizados,
+    mantendo o espaço que os separa de uma palavra.
+    """
+    # Import tardio, como em _prepare_lei_row.
+    from leizilla.ocr import normalize_text
+
+    partes = []
+    for parte in re.split(r"([%_])", texto):
+        if parte in ("%", "_"):
+            partes.append(parte)
+            continue
+        norm = normalize_text(parte)
+        if parte[:1].isspace():
+            norm = " " + norm
+        if parte[-1:].isspace() and norm != " ":
+            norm += " "
+        partes.append(norm)
+    return "".join(partes)
+
+
+def _text_predicate(texto: str) -> Tuple[str, str]:
+    """Função de filtro de texto e seu argumento para um termo de busca.
+
+    O termo é normalizado como `texto_normalizado` (`_normalize_query`). Sem
+    `%`, ou com curingas só nas pontas (`%x%`, `x%`, `%x`), vira
+    `contains`/`starts_with`/`ends_with`, que o DuckDB avalia direto na
+    coluna; qualquer outro padrão segue como LIKE.
+    """
+    texto = _normalize_query(texto)
+    if "%" not in texto:
+        return "contains", texto
+    inicio, fim = texto.startswith("%"), texto.endswith("%")
+    core = texto[int(inicio) : len(texto) - int(fim)]
+    if not core or "%" in core or "_" in core:
+        return "like", texto
+    if inicio and fim:
+        return "contains", core
+    return ("ends_with" if inicio else "starts_with"), core
+
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def _lei_row_sql(columns: Tuple[str, ...], ts_sql: str) -> Tuple[str, str]:
+    """SELECT e INSERT de uma linha de `leis`, montados uma vez por formato.
+
+    O scraper grava lei a lei sempre com as mesmas colunas. O SELECT diz, para
+    cada campo além de `id`, se o valor novo difere do gravado — a comparação
+    é do DuckDB, já no tipo da coluna ("2020-01-02" = DATE 2020-01-02);
+    placeholders: os campos, depois o id. O INSERT recebe as colunas na ordem
+    de `columns`, seguidas dos parâmetros de `ts_sql`.
+    """
+    fields = [c for c in columns if c != "id"]
+    diffs = ", ".join(f"{c} IS DISTINCT FROM ?" for c in fields)
+    select = f"SELECT {diffs or '1'} FROM leis WHERE id = ?"
+    insert = (
+        f"INSERT INTO leis ({', '.join(columns)}, updated_at) "
+        f"VALUES ({', '.join('?' for _ in columns)}, {ts_sql})"
+    )
+    return select, insert
+
+
+@lru_cache(maxsize=SQL_CACHE_SIZE)
+def _update_lei_sql(fields: Tuple[str, ...], ts_sql: str) -> str:
+    """UPDATE de `update_lei` para um conjunto de colunas, montado uma vez.
+
+    Placeholders na ordem: valores de `fields`, parâmetros de `ts_sql`, id.
+    """
+    set_clause = ", ".join([*(f"{k} = ?" for k in fields), f"updated_at = {ts_sql}"])
+    return f"UPDATE leis SET {set_clause} WHERE id = ?"
+
+
+@lru_cache(maxsize=None)
+def _search_sql(por_ente: bool, por_ano: bool, modo: Optional[str]) -> str:
+    """SQL de `search_leis` para um formato de filtro, montado uma vez por formato.
+
+    `modo`: None (sem texto), "bm25" (índice FTS), "like" ou uma das funções
+    de `_text_predicate`. Placeholders na ordem: texto (bm25), ente, ano,
+    termo do filtro, limit.
+    """
+    where = []
+    if por_ente:
+        where.append("ente = ?")
+    if por_ano:
+        where.append("ano = ?")
+    if modo == "like":
+        where.append("texto_normalizado LIKE ?")
+    elif modo in ("contains", "starts_with", "ends_with"):
+        where.append(f"{modo}(texto_normalizado, ?)")
+    if modo == "bm25":
+        # Busca por índice invertido (BM25) em vez de varrer a tabela com LIKE.
+        return f"""
+            SELECT l.id, l.titulo, l.ano, l.data_publicacao, l.tipo_lei, l.ente
+            FROM leis l
+            JOIN (
+                SELECT id, fts_main_leis.match_bm25(id, ?) AS score
+                FROM leis
+            ) s USING (id)
+            WHERE {" AND ".join(["s.score IS NOT NULL", *where])}
+            ORDER BY s.score DESC
+            LIMIT ?
+            """
+    return f"""
+        SELECT id, titulo, ano, data_publicacao, tipo_lei, ente
+        FROM leis
+        WHERE {" AND ".join(where) or "1=1"}
+        ORDER BY data_publicacao DESC
+        LIMIT ?
+        """
+
 
 class DuckDBStorage:
     """Gerenciador de storage DuckDB para leis."""
 
-    def __init__(self, db_path: Optional[Path] = None):
+    def __init__(self, db_path: Optional[Path] = None, read_only: bool = False):
         self.db_path = db_path or config.DUCKDB_PATH
+        # read_only: para comandos que só consultam (search, export). Vários
+        # processos read-only compartilham o arquivo sem o lock de escrita nem
+        # checkpoint/WAL. O DuckDB não aceita misturar, no mesmo processo, uma
+        # conexão read-only e outra read-write ao mesmo arquivo — por isso é
+        # um modo da instância, não uma segunda conexão.
+        self.read_only = read_only
         self.conn: Optional[duckdb.DuckDBPyConnection] = None
+        self._local = threading.local()
+        self._lock = threading.RLock()
+        # Escritas de threads diferentes (cada uma no seu cursor) na mesma linha
+        # abortam com "Conflict on update!" no controle otimista do DuckDB; um
+        # escritor por vez, leituras seguem em paralelo. Ordem: _write_lock
+        # antes de _lock.
+        self._write_lock = threading.RLock()
+        # Índice FTS (extensão `fts`) sobre leis; reconstruído sob demanda na
+        # próxima busca textual depois de qualquer escrita em `leis`. `_fts` fica
+        # None até a primeira busca (LOAD custa ~0,1 s; só paga quem busca texto).
+        self._fts: Optional[bool] = None
+        self._fts_dirty = True
+        # Colunas de `leis` (nome → tipo, na ordem do SELECT *); o schema é fixo,
+        # então lidas uma vez por conexão em vez de a cada consulta/lote.
+        self._leis_columns: Optional[Dict[str, str]] = None
+        # LRU de get_lei. `_lei_cache_gen` muda a cada escrita: uma leitura que
+        # cruzou um commit não entra no cache com o valor velho.
+        self._lei_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lei_cache_gen = 0
 
     def connect(self) -> duckdb.DuckDBPyConnection:
-        if self.conn is None:
-            self.conn = duckdb.connect(str(self.db_path))
-            self._create_schema()
-        return self.conn
+        """Conexão raiz na thread principal; um cursor próprio em cada worker.
 
-    def _create_schema(self) -> None:
+        Uma DuckDBPyConnection não pode ser usada por várias threads ao mesmo
+        tempo. `conn.cursor()` abre outra conexão sobre o mesmo banco, então
+        workers (ThreadPoolExecutor etc.) consultam/escrevem em paralelo sem
+        serializar tudo na conexão raiz.
+        """
+        with self._lock:
+            if self.conn is None:
+                # Banco ainda inexistente: abre read-write para criar o schema.
+                if self.read_only and Path(self.db_path).exists():
+                    self.conn = duckdb.connect(
+                        str(self.db_path), read_only=True, config=_duckdb_config()
+                    )
+                else:
+                    self.conn = duckdb.connect(
+                        str(self.db_path), config=_duckdb_config()
+                    )
+                    self._create_schema(self.conn)
+            root = self.conn
+        if threading.current_thread() is threading.main_thread():
+            return root
+        # O cursor morre com a raiz: após close()/connect() recria-se um novo.
+        if getattr(self._local, "root", None) is not root:
+            self._local.cursor = root.cursor()
+            self._local.root = root
+        cursor: duckdb.DuckDBPyConnection = self._local.cursor
+        return cursor
+
+    @contextmanager
+    def transaction(self) -> Iterator[duckdb.DuckDBPyConnection]:
+        """Agrupa escritas numa transação: um commit (e um flush de WAL) no fim.
+
+        Sem ela cada statement é autocommit. Reentrante por thread: um
+        `transaction()` (ou `insert_leis_bulk`) aninhado entra na transação de
+        fora, e só o bloco mais externo faz COMMIT — ou ROLLBACK em exceção.
+        Toda escrita passa por aqui e segura o lock de escritor até o fim.
+        """
         conn = self.connect()
+        depth = getattr(self._local, "tx_depth", 0)
+        if depth:
+            self._local.tx_depth = depth + 1
+            try:
+                yield conn
+            finally:
+                self._local.tx_depth = depth
+            return
+        with self._write_lock:
+            conn.begin()
+            self._local.tx_depth = 1
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                # Um rebuild do índice FTS feito no bloco foi desfeito junto.
+                self._fts_dirty = True
+                raise
+            finally:
+                self._local.tx_depth = 0
+                self._invalidate_lei_cache()
+
+    def _create_schema(self, conn: duckdb.DuckDBPyConnection) -> None:
         conn.execute("""
         CREATE TABLE IF NOT EXISTS leis (
             id VARCHAR PRIMARY KEY,
@@ -74,13 +398,13 @@ class DuckDBStorage:
         )
 
     def insert_resource(self, resource_data: Dict[str, Any]) -> None:
-        conn = self.connect()
         columns = ", ".join(resource_data.keys())
         placeholders = ", ".join(["?" for _ in resource_data])
-        conn.execute(
-            f"INSERT OR IGNORE INTO discovered_resources ({columns}) VALUES ({placeholders})",
-            list(resource_data.values()),
-        )
+        with self.transaction() as conn:
+            conn.execute(
+                f"INSERT OR IGNORE INTO discovered_resources ({columns}) VALUES ({placeholders})",
+                list(resource_data.values()),
+            )
 
     def get_pending_resources(
         self,
@@ -118,71 +442,522 @@ class DuckDBStorage:
         return [dict(zip(columns, row)) for row in results]
 
     def update_resource_status(
-        self, url: str, status: str, wayback_snapshot: Optional[str] = None
+        self,
+        url: str,
+        status: str,
+        wayback_snapshot: Optional[str] = None,
+        now: Optional[datetime] = None,
     ) -> None:
-        conn = self.connect()
-        now = datetime.now()
-        if wayback_snapshot:
+        # Um único statement: snapshot ausente (None/"") preserva o já gravado.
+        ts_sql, ts_params = _ts_sql(now)
+        with self.transaction() as conn:
             conn.execute(
-                "UPDATE discovered_resources SET status = ?, wayback_snapshot = ?, ultima_tentativa = ? WHERE url = ?",
-                [status, wayback_snapshot, now, url],
+                "UPDATE discovered_resources SET status = ?, "
+                "wayback_snapshot = COALESCE(NULLIF(?, ''), wayback_snapshot), "
+                f"ultima_tentativa = {ts_sql} WHERE url = ?",
+                [status, wayback_snapshot, *ts_params, url],
             )
-        else:
+
+    def insert_lei(
+        self, lei_data: Dict[str, Any], now: Optional[datetime] = None
+    ) -> None:
+        """Insere a lei; se o id já existe, atualiza só as colunas que mudaram.
+
+        Atalho de uma linha para `insert_leis_bulk`.
+        """
+        self.insert_leis_bulk([lei_data], now=now)
+
+    def insert_leis_bulk(
+        self,
+        leis: List[Dict[str, Any]],
+        now: Optional[datetime] = None,
+        chunk_size: int = BULK_CHUNK_SIZE,
+    ) -> None:
+        """Insere um lote de leis numa transação.
+
+        Ids novos entram num único INSERT ... SELECT sobre um NDJSON temporário
+        lido com `read_json` (mesmo caminho de `etl.write_parquet`): a API
+        Python do DuckDB não expõe o Appender, e tanto `executemany` quanto
+        parâmetros de lista custam por valor mais que a carga inteira.
+
+        Ids já gravados não são substituídos: INSERT OR REPLACE regravaria a
+        linha inteira e reindexaria todas as colunas indexadas mesmo quando só
+        `url_pdf_ia` mudou (caso típico de re-harvest). Só as colunas que
+        mudaram são atualizadas; colunas ausentes do dict são preservadas. Um
+        id repetido no lote equivale a chamadas sucessivas a `insert_lei`.
+
+        Linha com `texto_completo` e sem `texto_normalizado` ganha o derivado
+        por `ocr.normalize_text`, o mesmo do comando de OCR.
+
+        `now` carimba `updated_at`; por padrão, o CURRENT_TIMESTAMP do DuckDB
+        (início da transação: um único instante para o lote).
+        Lotes grandes são carregados em pedaços de `chunk_size` linhas, ainda
+        dentro da mesma transação.
+        """
+        lote: Dict[str, Dict[str, Any]] = {}
+        for lei_data in leis:
+            row = _prepare_lei_row(lei_data)
+            lote.setdefault(row["id"], {}).update(row)
+        if not lote:
+            return
+        _stamp_hashes(list(lote.values()))
+        # Linhas com o mesmo conjunto de chaves vão juntas: coluna ausente do
+        # dict fica com o DEFAULT da tabela, não com NULL.
+        grupos: Dict[tuple, List[Dict[str, Any]]] = {}
+        for row in lote.values():
+            grupos.setdefault(tuple(row), []).append(row)
+        with self.transaction() as conn:
+            for columns, rows in grupos.items():
+                for start in range(0, len(rows), chunk_size):
+                    self._insert_lote(
+                        conn, list(columns), rows[start : start + chunk_size], now
+                    )
+
+    def _insert_lote(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        columns: List[str],
+        rows: List[Dict[str, Any]],
+        batch_ts: Optional[datetime],
+    ) -> None:
+        ts_sql, ts_params = _ts_sql(batch_ts)
+        fields = [c for c in columns if c != "id"]
+        if len(rows) == 1:
+            # Uma linha (o `insert_lei` do scraper): o staging custa mais que
+            # um SELECT + INSERT diretos.
+            (row,) = rows
+            if "metadados" in row:
+                row = {**row, "metadados": _encode_json(row["metadados"])}
+            select_sql, insert_sql = _lei_row_sql(tuple(columns), ts_sql)
+            diffs = conn.execute(
+                select_sql, [*(row[c] for c in fields), row["id"]]
+            ).fetchone()
+            if diffs is not None:
+                self._update_changed(row, fields, diffs, batch_ts)
+                return
+            conn.execute(insert_sql, [*row.values(), *ts_params])
+            self._fts_dirty = True
+            return
+        tipos = self._leis_column_types()
+        unknown = [c for c in columns if c not in tipos]
+        if unknown:
+            raise ValueError(f"colunas desconhecidas em leis: {unknown}")
+        # Colunas JSON vão aninhadas no NDJSON e o read_json as serializa.
+        schema = ", ".join(f"'{c}': '{tipos[c]}'" for c in columns)
+        fd, tmp_path = tempfile.mkstemp(suffix=".ndjson")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(_JSON_ENCODER.encode(row) + "\n")
             conn.execute(
-                "UPDATE discovered_resources SET status = ?, ultima_tentativa = ? WHERE url = ?",
-                [status, now, url],
+                "CREATE OR REPLACE TEMP TABLE _leis_lote AS "
+                f"SELECT * FROM read_json(?, columns={{{schema}}})",
+                [tmp_path],
             )
+        finally:
+            os.unlink(tmp_path)
+        # Ids já gravados: um UPDATE só, comparando no SQL os valores já
+        # tipados pelo read_json.
+        self._update_from_lote(conn, fields, ts_sql, ts_params)
+        column_list = ", ".join(columns)
+        inseridas = conn.execute(
+            f"INSERT INTO leis ({column_list}, updated_at) "
+            f"SELECT {column_list}, {ts_sql} FROM _leis_lote ANTI JOIN leis USING (id)",
+            ts_params,
+        ).fetchone()
+        if inseridas and inseridas[0]:
+            self._fts_dirty = True
+        # Em erro, o rollback de insert_leis_bulk descarta a temp table junto.
+        conn.execute("DROP TABLE _leis_lote")
 
-    def insert_lei(self, lei_data: Dict[str, Any]) -> None:
-        conn = self.connect()
-        if "texto_completo" in lei_data and lei_data["texto_completo"]:
-            lei_data["hash_conteudo"] = hashlib.sha256(
-                lei_data["texto_completo"].encode("utf-8")
-            ).hexdigest()
-        if "metadados" in lei_data and isinstance(lei_data["metadados"], dict):
-            lei_data["metadados"] = json.dumps(lei_data["metadados"])
-        lei_data["updated_at"] = datetime.now()
-        columns = ", ".join(lei_data.keys())
-        placeholders = ", ".join(["?" for _ in lei_data])
+    def _update_from_lote(
+        self,
+        conn: duckdb.DuckDBPyConnection,
+        fields: List[str],
+        ts_sql: str,
+        ts_params: List[Any],
+        por_chaves: bool = False,
+    ) -> None:
+        """Atualiza as leis já gravadas a partir de `_leis_lote`, num UPDATE.
+
+        Só colunas de `fields` que diferem são reescritas, e só linhas com
+        alguma diferença ganham `updated_at`. `por_chaves`: cada linha do lote
+        traz em `_chaves` as colunas que tem (`ingest_jsonl`); as demais ficam
+        como estão.
+        """
+        if not fields:
+            return
+        difere = {
+            c: (f"list_contains(s._chaves, '{c}') AND " if por_chaves else "")
+            + f"leis.{c} IS DISTINCT FROM s.{c}"
+            for c in fields
+        }
+        fts = [f"({difere[c]})" for c in fields if c in _FTS_FIELDS]
+        if (
+            fts
+            and conn.execute(
+                "SELECT 1 FROM leis JOIN _leis_lote s ON leis.id = s.id "
+                f"WHERE {' OR '.join(fts)} LIMIT 1"
+            ).fetchone()
+        ):
+            self._fts_dirty = True
+        sets = ", ".join(
+            f"{c} = CASE WHEN {difere[c]} THEN s.{c} ELSE leis.{c} END" for c in fields
+        )
         conn.execute(
-            f"INSERT OR REPLACE INTO leis ({columns}) VALUES ({placeholders})",
-            list(lei_data.values()),
+            f"UPDATE leis SET {sets}, updated_at = {ts_sql} FROM _leis_lote s "
+            f"WHERE leis.id = s.id AND ({' OR '.join(f'({d})' for d in difere.values())})",
+            ts_params,
+        )
+
+    def _update_changed(
+        self,
+        row: Dict[str, Any],
+        fields: List[str],
+        diffs: Any,
+        batch_ts: Optional[datetime],
+    ) -> None:
+        """Atualiza as colunas que `diffs` (um booleano por campo) marca."""
+        changed = {
+            k: _encode_json(row[k]) if k == "metadados" else row[k]
+            for k, differs in zip(fields, diffs)
+            if differs
+        }
+        if changed:
+            self.update_lei(row["id"], changed, now=batch_ts)
+
+    def ingest_jsonl(self, path: Path, now: Optional[datetime] = None) -> int:
+        """Carrega um JSONL de leis (um objeto por linha) direto pelo DuckDB.
+
+        Para saídas grandes de conectores: o arquivo vai do `read_ndjson_objects`
+        para a tabela sem passar por dicts Python. Mesma semântica de
+        `insert_leis_bulk`, linha a linha: ids novos são inseridos (coluna
+        ausente da linha fica com o DEFAULT); ids já gravados têm atualizadas
+        só as colunas que a linha traz, quando alguma difere (`updated_at` só
+        nesses). `hash_conteudo` e `texto_normalizado` saem do `texto_completo`
+        como em `insert_leis_bulk`. Um id por linha: ids repetidos no arquivo,
+        como colunas desconhecidas ou linhas sem `id`, levantam ValueError sem
+        gravar nada. Devolve o número de linhas lidas.
+        """
+        tipos = self._leis_column_types()
+        # Cada linha lida inteira como JSON: as chaves vêm da própria linha, não
+        # de uma amostra do arquivo, e chave ausente ≠ valor null. Colunas JSON
+        # (objeto ou texto JSON) passam por json(): ficam compactas, como as
+        # grava `_encode_json`, e um re-insert idêntico não conta como mudança.
+        staged = ", ".join(
+            f"json(CASE json_type(json, '{c}') WHEN 'NULL' THEN NULL "
+            f"WHEN 'VARCHAR' THEN (json->>'{c}')::JSON ELSE json->'{c}' END) AS {c}"
+            if tipo == "JSON"
+            else f"CAST(json->>'{c}' AS {tipo}) AS {c}"
+            for c, tipo in tipos.items()
+            if c != "updated_at"
         )
+        ts_sql, ts_params = _ts_sql(now)
+        with self.transaction() as conn:
+            conn.execute(
+                "CREATE OR REPLACE TEMP TABLE _leis_lote AS "
+                f"SELECT json_keys(json) AS _chaves, {staged} "
+                "FROM read_ndjson_objects(?)",
+                [str(path)],
+            )
+            chaves = {
+                k
+                for (k,) in conn.execute(
+                    "SELECT DISTINCT UNNEST(_chaves) FROM _leis_lote"
+                ).fetchall()
+            }
+            chaves.discard("updated_at")
+            unknown = sorted(chaves - tipos.keys())
+            if unknown:
+                raise ValueError(f"colunas desconhecidas em leis: {unknown}")
+            total: int = (
+                conn.execute("SELECT COUNT(*) FROM _leis_lote").fetchone() or (0,)
+            )[0]
+            if (
+                total
+                and conn.execute(
+                    "SELECT 1 FROM _leis_lote WHERE id IS NULL LIMIT 1"
+                ).fetchone()
+            ):
+                raise ValueError(f"{path}: linhas sem `id`")
+            repetidos = conn.execute(
+                "SELECT id FROM _leis_lote GROUP BY id HAVING COUNT(*) > 1 "
+                "ORDER BY id LIMIT 5"
+            ).fetchall()
+            if repetidos:
+                raise ValueError(
+                    f"{path}: ids repetidos: {[lei_id for (lei_id,) in repetidos]}"
+                )
+            chaves |= self._derive_staged(conn)
+            self._update_from_lote(
+                conn, sorted(chaves - {"id"}), ts_sql, ts_params, por_chaves=True
+            )
+            # Como em insert_leis_bulk: um INSERT por conjunto de chaves, para
+            # que coluna ausente da linha receba o DEFAULT e não NULL.
+            grupos = conn.execute(
+                "SELECT DISTINCT list_sort(_chaves) "
+                "FROM _leis_lote ANTI JOIN leis USING (id)"
+            ).fetchall()
+            for (grupo,) in grupos:
+                column_list = ", ".join(c for c in grupo if c != "updated_at")
+                conn.execute(
+                    f"INSERT INTO leis ({column_list}, updated_at) "
+                    f"SELECT {column_list}, {ts_sql} FROM _leis_lote "
+                    "ANTI JOIN leis USING (id) WHERE list_sort(_chaves) = ?",
+                    [*ts_params, grupo],
+                )
+            if grupos:
+                self._fts_dirty = True
+            conn.execute("DROP TABLE _leis_lote")
+        return total
+
+    def _derive_staged(self, conn: duckdb.DuckDBPyConnection) -> Set[str]:
+        """Derivados de `texto_completo` em `_leis_lote`, como `_prepare_lei_row`.
+
+        `hash_conteudo` sai do sha256 do próprio DuckDB; `texto_normalizado`
+        (quando a linha não o traz) passa por `ocr.normalize_text`, em Python,
+        e volta por um NDJSON temporário. Devolve as colunas preenchidas.
+        """
+        derivadas: Set[str] = set()
+        hashes = conn.execute(
+            "UPDATE _leis_lote SET hash_conteudo = sha256(texto_completo), "
+            "_chaves = list_distinct(list_append(_chaves, 'hash_conteudo')) "
+            "WHERE COALESCE(texto_completo, '') <> ''"
+        ).fetchone()
+        if hashes and hashes[0]:
+            derivadas.add("hash_conteudo")
+        conn.execute(
+            "SELECT id, texto_completo FROM _leis_lote "
+            "WHERE COALESCE(texto_completo, '') <> '' "
+            "AND COALESCE(texto_normalizado, '') = ''"
+        )
+        fd, tmp_path = tempfile.mkstemp(suffix=".ndjson")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                batch = conn.fetchmany(FETCH_BATCH_SIZE)
+                if not batch:
+                    return derivadas
+                # Import tardio, como em _prepare_lei_row.
+                from leizilla.ocr import normalize_text
+
+                while batch:
+                    for lei_id, texto in batch:
+                        f.write(
+                            _JSON_ENCODER.encode(
+                                {"id": lei_id, "texto": normalize_text(texto)}
+                            )
+                            + "\n"
+                        )
+                    batch = conn.fetchmany(FETCH_BATCH_SIZE)
+            conn.execute(
+                "UPDATE _leis_lote SET texto_normalizado = n.texto, _chaves = "
+                "list_distinct(list_append(_chaves, 'texto_normalizado')) "
+                "FROM read_json(?, columns={'id': 'VARCHAR', 'texto': 'VARCHAR'}) n "
+                "WHERE _leis_lote.id = n.id",
+                [tmp_path],
+            )
+        finally:
+            os.unlink(tmp_path)
+        derivadas.add("texto_normalizado")
+        return derivadas
 
     def get_lei(self, lei_id: str) -> Optional[Dict[str, Any]]:
+        """Lei por id, servida do LRU quando possível (cópia: mutável à vontade)."""
+        # Dentro de uma transação o cache fica de fora nos dois sentidos: ele só
+        # é esvaziado no COMMIT, então estaria velho diante das escritas do
+        # próprio bloco, e a leitura pode ver escrita ainda não commitada.
+        in_tx = bool(getattr(self._local, "tx_depth", 0))
+        with self._lock:
+            cached = None if in_tx else self._lei_cache.get(lei_id)
+            if cached is not None:
+                self._lei_cache.move_to_end(lei_id)
+                return dict(cached)
+            gen = self._lei_cache_gen
         conn = self.connect()
         result = conn.execute("SELECT * FROM leis WHERE id = ?", [lei_id]).fetchone()
-        if result:
-            columns = [desc[0] for desc in (conn.description or [])]
-            return dict(zip(columns, result))
-        return None
+        if not result:
+            return None
+        lei = dict(zip(self._leis_column_types(), result))
+        if not in_tx:
+            with self._lock:
+                if gen == self._lei_cache_gen:
+                    self._lei_cache[lei_id] = lei
+                    if len(self._lei_cache) > LEI_CACHE_SIZE:
+                        self._lei_cache.popitem(last=False)
+        return dict(lei)
 
-    def get_leis_pending_ocr(
-        self, ente: Optional[str] = None, limit: int = 100
+    def _invalidate_lei_cache(self) -> None:
+        with self._lock:
+            self._lei_cache.clear()
+            self._lei_cache_gen += 1
+
+    def _leis_column_types(self) -> Dict[str, str]:
+        if self._leis_columns is None:
+            rows = (
+                self.connect()
+                .execute(
+                    "SELECT column_name, data_type FROM information_schema.columns "
+                    "WHERE table_name = 'leis' ORDER BY ordinal_position"
+                )
+                .fetchall()
+            )
+            self._leis_columns = dict(rows)
+        return self._leis_columns
+
+    def _get_leis_pending(
+        self, condition: str, ente: Optional[str], limit: int
     ) -> List[Dict[str, Any]]:
+        """Fila de trabalho: o predicado roda no scan, não em Python sobre a tabela.
+
+        Mais antigas primeiro (updated_at). Quem consome a fila marca as falhas
+        com `touch_lei`: o item que falhou vai para o fim, e N itens que sempre
+        falham não ocupam todo o `limit=N` de cada execução.
+        """
         conn = self.connect()
-        query = (
-            "SELECT * FROM leis WHERE (texto_completo IS NULL OR texto_completo = '')"
-        )
+        query = f"SELECT * FROM leis WHERE ({condition})"
         params: list[str | int] = []
         if ente:
             query += " AND ente = ?"
             params.append(ente)
-        query += " LIMIT ?"
+        query += " ORDER BY updated_at LIMIT ?"
         params.append(limit)
         results = conn.execute(query, params).fetchall()
-        columns = [desc[0] for desc in (conn.description or [])]
+        columns = list(self._leis_column_types())
         return [dict(zip(columns, row)) for row in results]
 
-    def update_lei(self, lei_id: str, updates: Dict[str, Any]) -> None:
-        conn = self.connect()
-        updates["updated_at"] = datetime.now()
-        set_clause = ", ".join([f"{k} = ?" for k in updates])
-        conn.execute(
-            f"UPDATE leis SET {set_clause} WHERE id = ?",
-            list(updates.values()) + [lei_id],
+    def get_leis_pending_ocr(
+        self, ente: Optional[str] = None, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        return self._get_leis_pending(
+            "texto_completo IS NULL OR texto_completo = ''", ente, limit
         )
 
+    def get_leis_pending_download(
+        self, ente: Optional[str] = None, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Leis com URL de origem, ainda sem PDF local nem cópia no IA."""
+        return self._get_leis_pending(
+            "COALESCE(url_original, '') <> '' AND COALESCE(local_pdf_path, '') = '' "
+            "AND COALESCE(url_pdf_ia, '') = ''",
+            ente,
+            limit,
+        )
+
+    def get_leis_pending_upload(
+        self, ente: Optional[str] = None, limit: int = 100
+    ) -> List[Dict[str, Any]]:
+        """Leis com PDF local ainda não enviado ao IA."""
+        return self._get_leis_pending(
+            "COALESCE(local_pdf_path, '') <> '' AND COALESCE(url_pdf_ia, '') = ''",
+            ente,
+            limit,
+        )
+
+    def update_lei(
+        self, lei_id: str, updates: Dict[str, Any], now: Optional[datetime] = None
+    ) -> None:
+        # `updated_at` vem sempre de `now`/CURRENT_TIMESTAMP, não do dict.
+        updates = {k: v for k, v in updates.items() if k != "updated_at"}
+        ts_sql, ts_params = _ts_sql(now)
+        with self.transaction() as conn:
+            conn.execute(
+                _update_lei_sql(tuple(updates), ts_sql),
+                [*updates.values(), *ts_params, lei_id],
+            )
+        if updates.keys() & set(_FTS_FIELDS):
+            self._fts_dirty = True
+
+    def touch_lei(self, lei_id: str, now: Optional[datetime] = None) -> None:
+        """Carimba `updated_at` sem mudar dados: registra uma tentativa que falhou."""
+        self.update_lei(lei_id, {}, now=now)
+
+    def _iter_query(
+        self, sql: str, params: List[Any], batch_size: int = FETCH_BATCH_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """Executa `sql` num cursor próprio e produz dicts em lotes de `batch_size`.
+
+        O cursor dedicado deixa o chamador escrever (update_lei, ...) pela conexão
+        principal enquanto itera, sem invalidar o resultado pendente. Dentro de
+        `transaction()` outro cursor não enxergaria as escritas ainda não
+        commitadas: a consulta roda na própria conexão e é lida de uma vez.
+        """
+        if getattr(self._local, "tx_depth", 0):
+            conn = self.connect()
+            conn.execute(sql, params)
+            columns = [desc[0] for desc in (conn.description or [])]
+            for row in conn.fetchall():
+                yield dict(zip(columns, row))
+            return
+        cursor = self.connect().cursor()
+        try:
+            cursor.execute(sql, params)
+            columns = [desc[0] for desc in (cursor.description or [])]
+            while batch := cursor.fetchmany(batch_size):
+                for row in batch:
+                    yield dict(zip(columns, row))
+        finally:
+            cursor.close()
+
+    def _fts_ready(self) -> bool:
+        """Garante o índice FTS de `leis` atualizado; False se não houver um.
+
+        O índice da extensão `fts` é um snapshot — não acompanha INSERT/UPDATE —
+        então é refeito preguiçosamente, uma vez por rajada de escritas que
+        inseriram leis ou mudaram `_FTS_FIELDS` (re-harvest idêntico ou só
+        `url_pdf_ia` não custam um rebuild). Read-only não reconstrói: usa o
+        índice gravado no arquivo enquanto ele corresponder à tabela.
+        """
+        conn = self.connect()
+        # O PRAGMA reescreve as tabelas do índice: é uma escrita.
+        with self._write_lock, self._lock:
+            if self._fts is None:
+                try:
+                    conn.execute("INSTALL fts")
+                    conn.execute("LOAD fts")
+                    self._fts = True
+                except duckdb.Error:
+                    # Fail-open: sem a extensão (offline, plataforma sem binário)
+                    # a busca textual cai no filtro sobre texto_normalizado.
+                    self._fts = False
+                if self._fts and self.read_only:
+                    # Com o arquivo aberto read-only nenhum processo escreve
+                    # nele: a marca é conferida uma vez por conexão.
+                    self._fts = self._fts_index_current(conn)
+            if not self._fts:
+                return False
+            if self.read_only:
+                return True
+            if self._fts_dirty:
+                campos = ", ".join(f"'{c}'" for c in _FTS_FIELDS)
+                conn.execute(
+                    f"PRAGMA create_fts_index('leis', 'id', {campos}, "
+                    "stemmer = 'portuguese', overwrite = 1)"
+                )
+                # Marca de versão do índice (o `overwrite` a apaga junto com ele).
+                conn.execute(
+                    f"CREATE TABLE fts_main_leis.leizilla_versao AS {_LEIS_VERSAO_SQL}"
+                )
+                self._fts_dirty = False
+        return True
+
+    def _fts_index_current(self, conn: duckdb.DuckDBPyConnection) -> bool:
+        """O índice gravado no arquivo corresponde a `leis` como está agora?
+
+        Mesmo número de linhas e mesma soma de hashes de id + colunas indexadas
+        que no rebuild dizem que o conteúdo indexado não mudou desde então.
+        Índice velho (ou ausente) daria resultado errado — cai no filtro.
+        """
+        try:
+            row = conn.execute(
+                "SELECT v.linhas = l.linhas "
+                "AND v.conteudo IS NOT DISTINCT FROM l.conteudo "
+                f"FROM fts_main_leis.leizilla_versao v, ({_LEIS_VERSAO_SQL}) l"
+            ).fetchone()
+        except (duckdb.CatalogException, duckdb.BinderException):
+            # Sem índice, ou marca gravada por uma versão anterior.
+            return False
+        return bool(row and row[0])
+
     def search_leis(
         self,
         ente: Optional[str] = None,
@@ -190,74 +965,117 @@ class DuckDBStorage:
         texto: Optional[str] = None,
         limit: int = 100,
     ) -> List[Dict[str, Any]]:
-        conn = self.connect()
-        where_clauses = []
-        params: List[Any] = []
+        # `%` explícito na consulta é um padrão LIKE do usuário (ex.: "lei%"),
+        # não palavras para o BM25.
+        modo: Optional[str] = None
+        termo: Optional[str] = None
+        if texto:
+            if "%" not in texto and self._fts_ready():
+                modo = "bm25"
+            else:
+                modo, termo = _text_predicate(texto)
+        params: List[Any] = [texto] if modo == "bm25" else []
         if ente:
-            where_clauses.append("ente = ?")
             params.append(ente)
         if ano:
-            where_clauses.append("ano = ?")
             params.append(ano)
-        if texto:
-            where_clauses.append("texto_normalizado LIKE ?")
-            params.append(f"%{texto}%")
-        where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-        results = conn.execute(
-            f"""
-            SELECT id, titulo, ano, data_publicacao, tipo_lei, ente
-            FROM leis
-            WHERE {where_sql}
-            ORDER BY data_publicacao DESC
-            LIMIT ?
-            """,
-            params + [limit],
-        ).fetchall()
-        columns = [desc[0] for desc in (conn.description or [])]
-        return [dict(zip(columns, row)) for row in results]
+        if termo is not None:
+            params.append(termo)
+        params.append(limit)
+        return list(self._iter_query(_search_sql(bool(ente), bool(ano), modo), params))
 
     def export_parquet(
         self,
         output_path: Path,
         ente: Optional[str] = None,
         ano: Optional[int] = None,
+        columns: Optional[List[str]] = None,
+        compression: str = "zstd",
     ) -> None:
+        """Exporta `leis` (filtrada por ente/ano) para Parquet.
+
+        `columns` restringe a projeção — quem só precisa de metadados não
+        arrasta `texto_completo` para o arquivo.
+        """
         conn = self.connect()
-        where_clauses = []
-        params: List[Any] = []
-        if ente:
-            where_clauses.append("ente = ?")
-            params.append(ente)
-        if ano:
-            where_clauses.append("ano = ?")
-            params.append(ano)
-        where_sql = " AND ".join(where_clauses) if where_clauses else "1=1"
-        conn.execute(
-            f"COPY (SELECT * FROM leis WHERE {where_sql}) "
-            f"TO '{output_path}' (FORMAT PARQUET, COMPRESSION SNAPPY)",
-            params,
+        if columns:
+            unknown = [c for c in columns if c not in self._leis_column_types()]
+            if unknown:
+                raise ValueError(f"colunas desconhecidas em leis: {unknown}")
+        # Um único shape de SQL (filtros opcionais via `$n IS NULL`) e o caminho
+        # de saída como argumento Python — nunca interpolado no SQL. O COPY do
+        # DuckDB não aceita `TO ?`; a API de relação escreve o mesmo COPY.
+        # ZSTD (nível default 3) sai ~1,5–2× menor que SNAPPY com decode
+        # comparável; row groups de 100k dão granularidade de predicate pushdown.
+        conn.sql(
+            f"SELECT {', '.join(columns) if columns else '*'} FROM leis "
+            "WHERE ($1::VARCHAR IS NULL OR ente = $1) "
+            "AND ($2::INTEGER IS NULL OR ano = $2)",
+            params=[ente or None, ano or None],
+        ).write_parquet(
+            str(output_path), compression=compression, row_group_size=100_000
         )
 
     def get_stats(self) -> Dict[str, Any]:
+        snap = self.snapshot()
+        return {
+            "total_leis": snap["total_leis"],
+            "por_ente": snap["por_ente"],
+            "por_ano": dict(list(snap["por_ano"].items())[:10]),
+        }
+
+    def snapshot(self, terms: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Retrato de `leis` numa varredura: contagens e leis por termo.
+
+        `total_leis`, `por_ente` (maior primeiro) e `por_ano` (todos, mais
+        recente primeiro) como em `get_stats`; `hits` dá, para cada termo, os
+        ids (ordenados) cujo `texto_normalizado` o contém. Serve a quem
+        faria vários `search_leis`/`get_stats` seguidos só para conferir o
+        conteúdo da base.
+        """
+        terms = terms or []
         conn = self.connect()
-        stats: Dict[str, Any] = {}
-        result = conn.execute("SELECT COUNT(*) FROM leis").fetchone()
-        stats["total_leis"] = result[0] if result else 0
-        results = conn.execute(
-            "SELECT ente, COUNT(*) FROM leis GROUP BY ente ORDER BY 2 DESC"
-        ).fetchall()
-        stats["por_ente"] = {row[0]: row[1] for row in results}
+        # Uma varredura só: total, por ente e por ano saem do mesmo GROUPING SETS.
+        # GROUPING(col) = 1 quando a coluna foi agregada (≠ valor NULL real de ano).
+        hits_sql = "".join(
+            ", list(id ORDER BY id) FILTER (WHERE contains(texto_normalizado, ?))"
+            for _ in terms
+        )
         results = conn.execute(
-            "SELECT ano, COUNT(*) FROM leis WHERE ano IS NOT NULL "
-            "GROUP BY ano ORDER BY ano DESC LIMIT 10"
+            f"SELECT GROUPING(ente), GROUPING(ano), ente, ano, COUNT(*){hits_sql} "
+            "FROM leis GROUP BY GROUPING SETS ((), (ente), (ano))",
+            [_normalize_query(term) for term in terms],
         ).fetchall()
-        stats["por_ano"] = {row[0]: row[1] for row in results}
-        return stats
+        total = 0
+        hits: Dict[str, List[str]] = {}
+        por_ente: List[tuple[str, int]] = []
+        por_ano: List[tuple[int, int]] = []
+        for g_ente, g_ano, ente, ano, count, *term_ids in results:
+            if g_ente and g_ano:
+                total = count
+                hits = {term: ids or [] for term, ids in zip(terms, term_ids)}
+            elif g_ano:
+                por_ente.append((ente, count))
+            elif ano is not None:
+                por_ano.append((ano, count))
+        por_ente.sort(key=lambda item: item[1], reverse=True)
+        por_ano.sort(reverse=True)
+        return {
+            "total_leis": total,
+            "por_ente": dict(por_ente),
+            "por_ano": dict(por_ano),
+            "hits": hits,
+        }
 
     def close(self) -> None:
-        if self.conn:
-            self.conn.close()
-            self.conn = None
+        with self._lock:
+            if self.conn:
+                self.conn.close()
+                self.conn = None
+                self._fts = None
+                self._fts_dirty = True
+                self._leis_columns = None
+                self._invalidate_lei_cache()
 
 
 # Backward-compat alias
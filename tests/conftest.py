@@ -0,0 +1,37 @@
+"""Configuração comum da suíte de testes."""
+
+import os
+import re
+from typing import Callable, Dict, Tuple
+
+import pytest
+
+# As tabelas dos testes têm poucas linhas: um thread e um teto de memória
+# baixo poupam o pool de threads e a reserva de memória do DuckDB a cada
+# conexão. Lidos por leizilla.config; valores já definidos no ambiente valem.
+os.environ.setdefault("DUCKDB_THREADS", "1")
+os.environ.setdefault("DUCKDB_MEMORY_LIMIT", "512MB")
+
+# Markdown do cotel_scrap: frontmatter entre linhas "---", depois o corpo.
+_FRONTMATTER_RE = re.compile(r"\A---\n(.*?)\n---\n(.*)\Z", re.S)
+# chave: valor | chave: "valor" | chave: |  seguido de um bloco indentado.
+_FRONTMATTER_KV_RE = re.compile(
+    r'^(\w+):[ \t]*(?:\|\n([ \t]+.*(?:\n[ \t]+.*)*)|"?([^"\n]*)"?)$', re.M
+)
+
+
+def _parse_frontmatter(markdown: str) -> Tuple[Dict[str, str], str]:
+    """Separa o markdown do cotel_scrap em (frontmatter, corpo)."""
+    match = _FRONTMATTER_RE.match(markdown)
+    assert match is not None, "markdown sem frontmatter"
+    frontmatter = {
+        key: "\n".join(line.strip() for line in block.splitlines()) if block else value
+        for key, block, value in _FRONTMATTER_KV_RE.findall(match.group(1))
+    }
+    return frontmatter, match.group(2)
+
+
+@pytest.fixture
+def parse_frontmatter() -> Callable[[str], Tuple[Dict[str, str], str]]:
+    """Parser do frontmatter do cotel_scrap, compartilhado pelos testes E2E."""
+    return _parse_frontmatter
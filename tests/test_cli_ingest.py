@@ -0,0 +1,41 @@
+"""Testes para o comando cmd_ingest."""
+
+import json
+
+from typer.testing import CliRunner
+
+from leizilla import config
+from leizilla.cli import app
+from leizilla.storage import DuckDBStorage
+
+runner = CliRunner()
+
+
+def test_ingest_loads_jsonl_into_local_db(tmp_path, monkeypatch):
+    db_path = tmp_path / "leizilla.duckdb"
+    monkeypatch.setattr(config, "DUCKDB_PATH", db_path)
+    path = tmp_path / "leis.jsonl"
+    path.write_text(
+        json.dumps({"id": "ro-lei-1", "titulo": "Lei 1", "ente": "ro"}) + "\n"
+    )
+
+    result = runner.invoke(app, ["ingest", str(path)])
+
+    assert result.exit_code == 0, result.output
+    assert "Carregadas 1 linhas" in result.output
+    db = DuckDBStorage(db_path, read_only=True)
+    try:
+        assert db.get_lei("ro-lei-1")["titulo"] == "Lei 1"
+    finally:
+        db.close()
+
+
+def test_ingest_reports_unknown_columns(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "DUCKDB_PATH", tmp_path / "leizilla.duckdb")
+    path = tmp_path / "leis.jsonl"
+    path.write_text('{"id": "ro-lei-1", "nao_existe": 1}\n')
+
+    result = runner.invoke(app, ["ingest", str(path)])
+
+    assert result.exit_code == 1
+    assert "nao_existe" in result.output
@@ -0,0 +1,36 @@
+"""Testes para cmd_pipeline: as etapas fecham o DuckDB antes do export read-only."""
+
+from unittest.mock import MagicMock, patch
+
+from typer.testing import CliRunner
+
+from leizilla.cli import app
+
+runner = CliRunner()
+
+
+def test_pipeline_closes_writers_before_read_only_export():
+    etapas = MagicMock()
+    with (
+        patch("leizilla.storage.DuckDBStorage", etapas.storage),
+        patch("leizilla.discovery.run_discovery", etapas.discover),
+        patch("leizilla.scraper.harvest_pending_resources", etapas.harvest),
+        patch("leizilla.publisher.InternetArchivePublisher", etapas.publisher),
+    ):
+        etapas.discover.return_value = 0
+        etapas.harvest.return_value = {"success": 0, "failed": 0, "robots-blocked": 0}
+        etapas.publisher.return_value.export_dataset_parquet.return_value = "x"
+
+        result = runner.invoke(app, ["pipeline", "--ente", "ro"])
+
+    assert result.exit_code == 0, result.output
+    ordem = [
+        name
+        for name, _, _ in etapas.mock_calls
+        if name in ("storage().close", "publisher().export_dataset_parquet")
+    ]
+    assert ordem == [
+        "storage().close",
+        "storage().close",
+        "publisher().export_dataset_parquet",
+    ]
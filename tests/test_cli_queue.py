@@ -0,0 +1,50 @@
+"""Testes das filas de trabalho (fetch-ocr, upload): falhas vão para o fim."""
+
+from unittest.mock import MagicMock, patch
+
+from typer.testing import CliRunner
+
+from leizilla.cli import app
+
+runner = CliRunner()
+
+
+def test_fetch_ocr_failure_touches_lei():
+    with (
+        patch("leizilla.storage.DuckDBStorage") as mock_db_class,
+        patch("leizilla.ocr.fetch_and_clean_ocr", return_value=None),
+    ):
+        mock_db = MagicMock()
+        mock_db.get_leis_pending_ocr.return_value = [{"id": "ro-lei-1"}]
+        mock_db_class.return_value = mock_db
+
+        result = runner.invoke(app, ["fetch-ocr"])
+
+    assert result.exit_code == 0
+    assert "0 com sucesso, 1 falhas" in result.output
+    mock_db.touch_lei.assert_called_once_with("ro-lei-1")
+    mock_db.update_lei.assert_not_called()
+
+
+def test_upload_failure_touches_lei(tmp_path):
+    pdf = tmp_path / "L1.pdf"
+    pdf.write_bytes(b"%PDF")
+    with (
+        patch("leizilla.storage.DuckDBStorage") as mock_db_class,
+        patch("leizilla.publisher.InternetArchivePublisher") as mock_pub_class,
+    ):
+        mock_db = MagicMock()
+        mock_db.get_leis_pending_upload.return_value = [
+            {"id": "ro-lei-1", "local_pdf_path": str(pdf)},
+            {"id": "ro-lei-2", "local_pdf_path": str(tmp_path / "sumiu.pdf")},
+        ]
+        mock_db_class.return_value = mock_db
+        mock_pub_class.return_value.upload_raw.return_value = {"success": False}
+
+        result = runner.invoke(app, ["upload"])
+
+    assert result.exit_code == 0
+    assert [c.args for c in mock_db.touch_lei.call_args_list] == [
+        ("ro-lei-1",),
+        ("ro-lei-2",),
+    ]
@@ -18,6 +18,8 @@ import leizilla.config as config
 ENV_VARS = [
     "DATA_DIR",
     "DUCKDB_PATH",
+    "DUCKDB_THREADS",
+    "DUCKDB_MEMORY_LIMIT",
     "IA_ACCESS_KEY",
     "IAS3_ACCESS_KEY",
     "IA_SECRET_KEY",
@@ -29,6 +31,8 @@ ENV_VARS = [
     "CRAWLER_DELAY",
     "CRAWLER_RETRIES",
     "CRAWLER_TIMEOUT",
+    "IA_UPLOAD_TIMEOUT_S",
+    "IA_UPLOAD_MIN_RATE",
 ]
 
 
@@ -67,6 +71,10 @@ def test_defaults(reload_config: Callable[..., types.ModuleType]) -> None:
     assert cfg.ANTHROPIC_API_KEY is None
     assert cfg.GEMINI_API_KEY is None
     assert cfg.LLM_MODEL is None
+    assert cfg.DUCKDB_THREADS is None
+    assert cfg.DUCKDB_MEMORY_LIMIT is None
+    assert cfg.IA_UPLOAD_TIMEOUT_S == 600.0
+    assert cfg.IA_UPLOAD_MIN_RATE == 64 * 1024
 
 
 def test_gemini_key_with_google_fallback(
@@ -136,6 +144,15 @@ def test_duckdb_path_env_override(
     assert cfg.DUCKDB_PATH == Path("/tmp/custom/leizilla-test.duckdb")
 
 
+def test_duckdb_tuning_env_overrides(
+    reload_config: Callable[..., types.ModuleType],
+) -> None:
+    cfg = reload_config(DUCKDB_THREADS="2", DUCKDB_MEMORY_LIMIT="512MB")
+
+    assert cfg.DUCKDB_THREADS == 2
+    assert cfg.DUCKDB_MEMORY_LIMIT == "512MB"
+
+
 def test_crawler_env_overrides(reload_config: Callable[..., types.ModuleType]) -> None:
     cfg = reload_config(
         CRAWLER_DELAY="500",
@@ -194,3 +211,12 @@ def test_invalid_crawler_delay_raises(
     """
     with pytest.raises(ValueError):
         reload_config(CRAWLER_DELAY="not-a-number")
+
+
+def test_ia_upload_timeout_env_overrides(
+    reload_config: Callable[..., types.ModuleType],
+) -> None:
+    cfg = reload_config(IA_UPLOAD_TIMEOUT_S="120", IA_UPLOAD_MIN_RATE="1048576")
+
+    assert cfg.IA_UPLOAD_TIMEOUT_S == 120.0
+    assert cfg.IA_UPLOAD_MIN_RATE == 1048576
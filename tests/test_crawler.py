@@ -1,6 +1,8 @@
-"""Tests for crawler pure helpers (no network/Playwright)."""
+"""Tests for the crawler (no network, no real Playwright browser)."""
 
-from leizilla.crawler import parse_titulo_identity
+import asyncio
+
+from leizilla.crawler import LeisCrawler, parse_titulo_identity
 
 
 class TestParseTituloIdentity:
@@ -52,3 +54,93 @@ class TestParseTituloIdentity:
 
     def test_empty_returns_none(self):
         assert parse_titulo_identity("") is None
+
+
+class _StubElement:
+    def __init__(self, text: str = "", href: str = ""):
+        self._text = text
+        self._href = href
+
+    async def inner_text(self) -> str:
+        return self._text
+
+    async def get_attribute(self, name: str) -> str:
+        return self._href
+
+
+class _StubPage:
+    def __init__(self) -> None:
+        self.url = ""
+        self.closed = False
+        self.selectors: list = []
+
+    async def goto(self, url: str, timeout: float) -> None:
+        self.url = url
+
+    async def wait_for_load_state(self, state: str) -> None:
+        pass
+
+    async def query_selector(self, selector: str) -> _StubElement:
+        self.selectors.append(selector)
+        coddoc = self.url.rsplit("/", 1)[-1]
+        return _StubElement(f"LEI Nº {coddoc}, DE 2001")
+
+    async def query_selector_all(self, selector: str) -> list:
+        self.selectors.append(selector)
+        return [_StubElement(href="/arquivos/lei.pdf")]
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class _StubBrowser:
+    def __init__(self) -> None:
+        self.pages: list = []
+        self.closed = False
+
+    async def new_page(self) -> _StubPage:
+        page = _StubPage()
+        self.pages.append(page)
+        return page
+
+    async def close(self) -> None:
+        self.closed = True
+
+
+class TestDiscoverRondoniaWithSharedBrowser:
+    def test_reuses_caller_browser_without_closing_it(self):
+        crawler = LeisCrawler()
+        crawler.delay_ms = 0
+        browser = _StubBrowser()
+
+        async def run() -> tuple:
+            first = await crawler.discover_rondonia_laws(1, 2, browser=browser)
+            second = await crawler.discover_rondonia_laws(3, 3, browser=browser)
+            return first, second
+
+        first, second = asyncio.run(run())
+        assert [law["chave"] for law in first] == ["lei-00001", "lei-00002"]
+        assert (
+            first[0]["url_pdf_original"] == "https://www.al.ro.leg.br/arquivos/lei.pdf"
+        )
+        assert [law["chave"] for law in second] == ["lei-00003"]
+        # One page per call, each closed; the shared browser stays open.
+        assert len(browser.pages) == 2
+        assert all(page.closed for page in browser.pages)
+        assert not browser.closed
+
+    def test_queries_use_plain_css_selectors(self):
+        # CSS goes straight to querySelector; role=/text=/xpath engines walk the
+        # accessibility tree or evaluate XPath in the page and are slower.
+        crawler = LeisCrawler()
+        crawler.delay_ms = 0
+        browser = _StubBrowser()
+        asyncio.run(crawler.discover_rondonia_laws(1, 1, browser=browser))
+        selectors = browser.pages[0].selectors
+        assert selectors
+        assert not [
+            s
+            for s in selectors
+            if s.startswith(("role=", "text=", "xpath=", "internal:", "//", "("))
+            or ">>" in s
+        ]
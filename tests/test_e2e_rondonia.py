@@ -10,39 +10,30 @@ This test validates the complete pipeline:
 Using sample laws from pge-ro/cotel_scrap/markdown_laws/ as test data.
 """
 
-import pytest
-import tempfile
+import os
 from pathlib import Path
+from time import perf_counter_ns
+from types import MappingProxyType
 
-from leizilla.storage import DuckDBStorage
-
-
-class TestLeisillaE2ERondonia:
-    """End-to-end tests using real Rondônia laws data."""
+import duckdb
+import pytest
 
-    @pytest.fixture
-    def temp_storage(self):
-        """Create temporary storage for testing."""
-        with tempfile.TemporaryDirectory() as temp_dir:
-            db_path = Path(temp_dir) / "test_leizilla.duckdb"
-            storage = DuckDBStorage(db_path)
-            storage.connect()
-            yield storage
-            storage.close()
+from leizilla.storage import DuckDBStorage
 
-    @pytest.fixture
-    def sample_rondonia_laws(self):
-        """Sample laws data extracted from pge-ro/cotel_scrap."""
-        return [
-            {
-                "id": "rondonia_dl_2_1981",
-                "titulo": "DECRETO LEI n. 2",
-                "numero": "2",
-                "ano": 1981,
-                "data_publicacao": "1981-12-31",
-                "tipo_lei": "decreto-lei",
-                "ente": "rondonia",
-                "texto_completo": """DECRETO-LEI N° 2, DE 31 DE DEZEMBRO DE 1981
+# Sample laws data extracted from pge-ro/cotel_scrap, built once and read-only
+# (storage copies each row before writing it).
+SAMPLE_RONDONIA_LAWS = tuple(
+    MappingProxyType(law)
+    for law in (
+        {
+            "id": "rondonia_dl_2_1981",
+            "titulo": "DECRETO LEI n. 2",
+            "numero": "2",
+            "ano": 1981,
+            "data_publicacao": "1981-12-31",
+            "tipo_lei": "decreto-lei",
+            "ente": "rondonia",
+            "texto_completo": """DECRETO-LEI N° 2, DE 31 DE DEZEMBRO DE 1981
 
 Orça a Receita e fixa a Despesa do Orçamento-Programa do Estado para o exercício de 1982.
 
@@ -69,43 +60,78 @@ Artigo 8° - Este Decreto-Lei entrará em vigor na data de sua publicação.
 Porto Velho, 31 de dezembro de 1981.
 JORGE TEIXEIRA
 GOVERNADOR DO ESTADO""",
-                "texto_normalizado": "decreto lei 2 1981 orça receita despesa orçamento programa estado exercício 1982 governador rondônia",
-                "url_original": "http://ditel.casacivil.ro.gov.br/COTEL/Livros/detalhes.aspx?coddoc=2",
-                "metadados": {
-                    "coddoc": "2",
-                    "ementa": "Orça a Receita e fixa a Despesa do Orçamento-Programa do Estado para o exercício de 1982.",
-                    "fonte": "cotel_scrap",
-                },
+            "url_original": "http://ditel.casacivil.ro.gov.br/COTEL/Livros/detalhes.aspx?coddoc=2",
+            "metadados": {
+                "coddoc": "2",
+                "ementa": "Orça a Receita e fixa a Despesa do Orçamento-Programa do Estado para o exercício de 1982.",
+                "fonte": "cotel_scrap",
             },
-            {
-                "id": "rondonia_lei_3_1982",
-                "titulo": "LEI n. 3",
-                "numero": "3",
-                "ano": 1982,
-                "data_publicacao": "1982-01-01",
-                "tipo_lei": "lei",
-                "ente": "rondonia",
-                "texto_completo": "Texto de exemplo da Lei 3 de Rondônia para teste do sistema Leizilla.",
-                "texto_normalizado": "lei 3 rondônia teste sistema leizilla",
-                "url_original": "http://ditel.casacivil.ro.gov.br/COTEL/Livros/detalhes.aspx?coddoc=3",
-                "metadados": {
-                    "coddoc": "3",
-                    "ementa": "Lei de exemplo para teste",
-                    "fonte": "cotel_scrap",
-                },
+        },
+        {
+            "id": "rondonia_lei_3_1982",
+            "titulo": "LEI n. 3",
+            "numero": "3",
+            "ano": 1982,
+            "data_publicacao": "1982-01-01",
+            "tipo_lei": "lei",
+            "ente": "rondonia",
+            "texto_completo": "Texto de exemplo da Lei 3 de Rondônia para teste do sistema Leizilla.",
+            "url_original": "http://ditel.casacivil.ro.gov.br/COTEL/Livros/detalhes.aspx?coddoc=3",
+            "metadados": {
+                "coddoc": "3",
+                "ementa": "Lei de exemplo para teste",
+                "fonte": "cotel_scrap",
             },
-        ]
+        },
+    )
+)
+
+
+class _Rollback(Exception):
+    """Raised after each test to undo its transaction on the shared storage."""
+
+
+@pytest.fixture(scope="session")
+def sample_rondonia_laws():
+    """Sample laws data extracted from pge-ro/cotel_scrap."""
+    return SAMPLE_RONDONIA_LAWS
+
+
+@pytest.fixture(scope="module")
+def shared_storage():
+    """One in-memory database (schema created once) for every test in the module.
+
+    In-memory and per process: no files, and nothing shared if the suite is
+    split across worker processes (pytest-xdist).
+    """
+    storage = DuckDBStorage(Path(":memory:"))
+    storage.connect()
+    yield storage
+    storage.close()
+
+
+class TestLeisillaE2ERondonia:
+    """End-to-end tests using real Rondônia laws data."""
+
+    @pytest.fixture
+    def temp_storage(self, shared_storage):
+        """The shared storage, isolated per test by a transaction rolled back at the end."""
+        try:
+            with shared_storage.transaction():
+                yield shared_storage
+                raise _Rollback
+        except _Rollback:
+            pass
 
     def test_complete_pipeline_rondonia_laws(self, temp_storage, sample_rondonia_laws):
         """Test complete pipeline with real Rondônia laws data."""
         storage = temp_storage
 
         # 1. Test database initialization
-        assert storage.db_path.exists()
+        assert storage.get_stats()["total_leis"] == 0
 
         # 2. Test inserting sample laws (simulating discovery + download)
-        for law in sample_rondonia_laws:
-            storage.insert_lei(law)
+        storage.insert_leis_bulk(sample_rondonia_laws)
 
         # 3. Test retrieval functionality
         decree_law_2 = storage.get_lei("rondonia_dl_2_1981")
@@ -114,38 +140,21 @@ GOVERNADOR DO ESTADO""",
         assert "orçamento" in decree_law_2["texto_completo"].lower()
         assert "1982" in decree_law_2["texto_completo"]
 
-        # 4. Test search functionality
-        search_results = storage.search_leis(ente="rondonia", texto="orçamento")
-        assert len(search_results) >= 1
-        assert any("DECRETO LEI n. 2" in result["titulo"] for result in search_results)
-
-        search_receita = storage.search_leis(texto="receita")
-        assert len(search_receita) >= 1
-
-        search_governador = storage.search_leis(texto="governador")
-        assert len(search_governador) >= 1
-
-        # 5. Test filtering by origem and year
-        rondonia_laws = storage.search_leis(ente="rondonia")
-        assert len(rondonia_laws) == 2
-
-        laws_1981 = storage.search_leis(ano=1981)
-        assert len(laws_1981) == 1
-        assert laws_1981[0]["ano"] == 1981
-
-        # 6. Test stats functionality
-        stats = storage.get_stats()
-        assert stats["total_leis"] == 2
-        assert "rondonia" in stats["por_ente"]
-        assert stats["por_ente"]["rondonia"] == 2
+        # 4-6. Search hits, filters by ente/year and stats from one snapshot
+        snap = storage.snapshot(["orçamento", "receita", "governador"])
+        assert "rondonia_dl_2_1981" in snap["hits"]["orçamento"]
+        assert snap["hits"]["receita"]
+        assert snap["hits"]["governador"]
+        assert snap["total_leis"] == 2
+        assert snap["por_ente"] == {"rondonia": 2}
+        assert snap["por_ano"][1981] == 1
 
     def test_real_world_search_scenarios(self, temp_storage, sample_rondonia_laws):
         """Test real-world search scenarios using Rondônia law content."""
         storage = temp_storage
 
         # Insert test data
-        for law in sample_rondonia_laws:
-            storage.insert_lei(law)
+        storage.insert_leis_bulk(sample_rondonia_laws)
 
         # Test legal term searches (common in legal research)
         legal_terms = [
@@ -158,28 +167,29 @@ GOVERNADOR DO ESTADO""",
             "governador",
         ]
 
-        for term in legal_terms:
-            results = storage.search_leis(texto=term)
-            # At least some results should be found for common legal terms present in our data
-            if term in ["decreto", "orçamento", "receita", "estado", "governador"]:
-                assert len(results) >= 1, f"Search for '{term}' should return results"
+        # One SQL pass for every term instead of a search per term
+        hits = storage.snapshot(legal_terms)["hits"]
+        matched = {term for term, ids in hits.items() if ids}
+        assert {"decreto", "orçamento", "receita", "estado", "governador"} <= matched
 
-    def test_data_export_formats(self, temp_storage, sample_rondonia_laws):
+    def test_data_export_formats(self, temp_storage, sample_rondonia_laws, tmp_path):
         """Test data export functionality with real data."""
         storage = temp_storage
 
         # Insert test data
-        for law in sample_rondonia_laws:
-            storage.insert_lei(law)
-
-        # Test export to different formats
-        with tempfile.TemporaryDirectory() as export_dir:
-            export_path = Path(export_dir)
-
-            # Test Parquet export
-            parquet_file = export_path / "rondonia_laws.parquet"
-            storage.export_parquet(parquet_file, ente="rondonia")
-            assert parquet_file.exists()
+        storage.insert_leis_bulk(sample_rondonia_laws)
+
+        # Test Parquet export
+        parquet_file = tmp_path / "rondonia_laws.parquet"
+        storage.export_parquet(parquet_file, ente="rondonia")
+        assert parquet_file.exists()
+        conn = duckdb.connect()
+        try:
+            assert conn.execute(
+                "SELECT count(*) FROM read_parquet(?)", [str(parquet_file)]
+            ).fetchone() == (len(sample_rondonia_laws),)
+        finally:
+            conn.close()
 
     def test_data_integrity_and_validation(self, temp_storage, sample_rondonia_laws):
         """Test data integrity and validation with real content."""
@@ -204,34 +214,40 @@ GOVERNADOR DO ESTADO""",
         stats = storage.get_stats()
         assert stats["total_leis"] == 1
 
-    def test_performance_with_real_content(self, temp_storage, sample_rondonia_laws):
-        """Test performance with realistic content sizes."""
-        storage = temp_storage
+    def test_performance_with_real_content(
+        self, temp_storage, sample_rondonia_laws, record_property
+    ):
+        """Test performance with realistic content sizes.
 
-        import time
+        Timings are always recorded (junit properties); the time budgets are
+        only enforced with RUN_PERF_TESTS=1, so a loaded CI runner cannot
+        make the suite flaky.
+        """
+        storage = temp_storage
+        enforce = bool(os.environ.get("RUN_PERF_TESTS"))
 
         # Test insertion performance
-        start_time = time.time()
-        for law in sample_rondonia_laws:
-            storage.insert_lei(law)
-        insertion_time = time.time() - start_time
-
-        # Should complete within reasonable time
-        assert insertion_time < 1.0, "Insertion should be fast"
+        start_ns = perf_counter_ns()
+        storage.insert_leis_bulk(sample_rondonia_laws)
+        insertion_ns = perf_counter_ns() - start_ns
+        record_property("insertion_ns", insertion_ns)
+        if enforce:
+            assert insertion_ns < 1_000_000_000, "Insertion should be fast"
 
         # Test search performance
-        start_time = time.time()
+        start_ns = perf_counter_ns()
         results = storage.search_leis(texto="orçamento")
-        search_time = time.time() - start_time
-
-        assert search_time < 0.5, "Search should be fast"
+        search_ns = perf_counter_ns() - start_ns
+        record_property("search_ns", search_ns)
+        if enforce:
+            assert search_ns < 500_000_000, "Search should be fast"
         assert len(results) > 0, "Should find relevant results"
 
 
 class TestLeisillaIntegrationWithCotelScrap:
     """Integration tests that validate compatibility with cotel_scrap data format."""
 
-    def test_cotel_scrap_markdown_compatibility(self, tmp_path):
+    def test_cotel_scrap_markdown_compatibility(self, parse_frontmatter):
         """Test compatibility with cotel_scrap markdown format."""
         # Simulate cotel_scrap markdown structure
         markdown_content = """---
@@ -257,28 +273,13 @@ Orça a Receita e fixa a Despesa do Orçamento-Programa do Estado para o exercí
 """
 
         # Test parsing frontmatter and content
-        lines = markdown_content.split("\n")
-        in_frontmatter = False
-        frontmatter = {}
-        content_lines = []
-
-        for line in lines:
-            if line.strip() == "---":
-                in_frontmatter = not in_frontmatter
-                continue
-
-            if in_frontmatter:
-                if ":" in line:
-                    key, value = line.split(":", 1)
-                    frontmatter[key.strip()] = value.strip().strip('"')
-            else:
-                content_lines.append(line)
-
-        # Verify parsed data (simple inline values only — block scalar "|" not supported)
+        frontmatter, full_content = parse_frontmatter(markdown_content)
+
+        # Verify parsed data, including the "|" block scalar
         assert frontmatter["title"] == "DECRETO LEI n. 2"
         assert frontmatter["coddoc"] == "2"
+        assert frontmatter["summary"].startswith("Orça a Receita")
 
-        full_content = "\n".join(content_lines)
         assert "GOVERNO DO ESTADO DE RONDÔNIA" in full_content
         assert "1981" in full_content
 
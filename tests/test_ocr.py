@@ -134,3 +134,10 @@ def test_cli_fetch_ocr_success():
             "texto_normalizado": "lei constituicao",
         },
     )
+
+
+def test_normalize_text_non_latin_marks_and_symbols():
+    # Caminho lento: marca combinante fora do bloco latino e símbolos não-ASCII.
+    assert normalize_text("Art. 1º, R$5€ ação") == "art 1o r5 acao"
+    assert normalize_text("क़ानून lei") == "lei"
+    assert normalize_text("ﬁm do texto") == "fim do texto"
@@ -378,6 +378,55 @@ class TestRunIaUploadRetry:
         assert len(delays) == 2
         assert delays[0] < delays[1]
 
+    @patch("time.sleep")
+    def test_hung_upload_times_out_and_is_retried(self, mock_sleep):
+        import subprocess
+
+        pub = self._publisher()
+        hung = subprocess.TimeoutExpired("ia", timeout=600)
+        success = MagicMock(returncode=0)
+        with patch("subprocess.run", side_effect=[hung, success]) as mock_run:
+            result = pub._run_ia_upload(["ia", "upload", "some-id"])
+        assert result is success
+        assert mock_run.call_count == 2
+        assert mock_run.call_args.kwargs["timeout"] > 0
+        assert mock_sleep.call_count == 1
+
+    def test_timeout_scales_with_payload_size(self, tmp_path, monkeypatch):
+        from leizilla import config
+
+        monkeypatch.setattr(config, "IA_UPLOAD_TIMEOUT_S", 600.0)
+        monkeypatch.setattr(config, "IA_UPLOAD_MIN_RATE", 1000)
+        small = tmp_path / "meta.json"
+        small.write_bytes(b"x" * 500)
+        big = tmp_path / "bundle.zip"
+        big.write_bytes(b"x" * 9_500)
+        with patch("subprocess.run") as mock_run:
+            mock_run.return_value = MagicMock(returncode=0)
+            self._publisher()._run_ia_upload(
+                ["ia", "upload", "some-id", "--metadata", "a:b"]
+            )
+            assert mock_run.call_args.kwargs["timeout"] == 600.0
+            # Publisher novo: o rate limiter não espaça a segunda chamada.
+            self._publisher()._run_ia_upload(
+                ["ia", "upload", "some-id", str(big), str(small), "--metadata", "a:b"]
+            )
+            assert mock_run.call_args.kwargs["timeout"] == 610.0
+
+    @patch("time.sleep")
+    def test_persistent_timeout_propagates_after_max_attempts(self, mock_sleep):
+        import subprocess
+
+        pub = self._publisher()
+        hung = subprocess.TimeoutExpired("ia", timeout=600)
+        with patch("subprocess.run", side_effect=hung) as mock_run:
+            try:
+                pub._run_ia_upload(["ia", "upload", "some-id"])
+                raise AssertionError("expected CalledProcessError to propagate")
+            except subprocess.CalledProcessError as e:
+                assert "timeout" in e.stderr
+        assert mock_run.call_count == 5  # _IA_UPLOAD_MAX_ATTEMPTS
+
     def test_paces_successive_uploads_via_shared_rate_limiter(self):
         pub = self._publisher()
         with (
@@ -12,7 +12,7 @@ import pytest
 from leizilla.storage import DuckDBStorage
 
 # Sample laws data extracted from pge-ro/cotel_scrap
-SAMPLE_LAWS = [
+SAMPLE_LAWS = (
     {
         "id": "rondonia_dl_2_1981",
         "titulo": "DECRETO LEI n. 2",
@@ -48,7 +48,6 @@ Artigo 8° - Este Decreto-Lei entrará em vigor na data de sua publicação.
 Porto Velho, 31 de dezembro de 1981.
 JORGE TEIXEIRA
 GOVERNADOR DO ESTADO""",
-        "texto_normalizado": "decreto lei 2 1981 orça receita despesa orçamento programa estado exercício 1982 governador rondônia",
         "url_original": "http://ditel.casacivil.ro.gov.br/COTEL/Livros/detalhes.aspx?coddoc=2",
         "metadados": {
             "coddoc": "2",
@@ -65,7 +64,6 @@ GOVERNADOR DO ESTADO""",
         "tipo_lei": "lei",
         "ente": "rondonia",
         "texto_completo": "Texto de exemplo da Lei 3 de Rondônia para teste do sistema Leizilla.",
-        "texto_normalizado": "lei 3 rondônia teste sistema leizilla",
         "url_original": "http://ditel.casacivil.ro.gov.br/COTEL/Livros/detalhes.aspx?coddoc=3",
         "metadados": {
             "coddoc": "3",
@@ -73,7 +71,7 @@ GOVERNADOR DO ESTADO""",
             "fonte": "cotel_scrap",
         },
     },
-]
+)
 
 
 @pytest.fixture
@@ -82,8 +80,7 @@ def storage(tmp_path: Path):
     db_path = tmp_path / "test_leizilla.duckdb"
     db = DuckDBStorage(db_path)
     db.connect()
-    for law in SAMPLE_LAWS:
-        db.insert_lei(law)
+    db.insert_leis_bulk(SAMPLE_LAWS)
     yield db
     db.close()
 
@@ -145,12 +142,13 @@ def test_data_integrity(storage: DuckDBStorage) -> None:
 
 def test_real_world_legal_search_terms(storage: DuckDBStorage) -> None:
     """Common legal research terms present in the corpus return results."""
-    for term in ["decreto", "orçamento", "receita", "estado", "governador"]:
-        results = storage.search_leis(texto=term)
-        assert len(results) >= 1, f"Should find results for legal term: {term}"
+    terms = ["decreto", "orçamento", "receita", "estado", "governador"]
+    hits = storage.snapshot(terms)["hits"]
+    for term in terms:
+        assert hits[term], f"Should find results for legal term: {term}"
 
 
-def test_cotel_scrap_markdown_compatibility() -> None:
+def test_cotel_scrap_markdown_compatibility(parse_frontmatter) -> None:
     """Frontmatter + content of cotel_scrap markdown files parse as expected."""
     markdown_content = """---
 title: "DECRETO LEI n. 2"
@@ -172,48 +170,13 @@ Gabinete do Governador
 DECRETO-LEI N° 2, DE 31 DE DEZEMBRO DE 1981
 """
 
-    lines = markdown_content.split("\n")
-    in_frontmatter = False
-    frontmatter: dict[str, str] = {}
-    content_lines: list[str] = []
-
-    for line in lines:
-        if line.strip() == "---":
-            in_frontmatter = not in_frontmatter
-            continue
-
-        if in_frontmatter:
-            if ":" in line and not line.strip().startswith("|"):
-                key, value = line.split(":", 1)
-                key = key.strip()
-                value = value.strip().strip('"')
-
-                # Handle multiline values starting with |
-                if value == "|":
-                    frontmatter[key] = ""
-                elif (
-                    key in frontmatter
-                    and isinstance(frontmatter[key], str)
-                    and frontmatter[key] == ""
-                ):
-                    if line.strip():
-                        frontmatter[key] = line.strip()
-                else:
-                    frontmatter[key] = value
-            elif line.strip() and any(k for k, v in frontmatter.items() if v == ""):
-                # Continuation of multiline value
-                for k, v in frontmatter.items():
-                    if v == "":
-                        frontmatter[k] = line.strip()
-                        break
-        else:
-            content_lines.append(line)
+    frontmatter, full_content = parse_frontmatter(markdown_content)
 
     assert frontmatter["title"] == "DECRETO LEI n. 2"
     assert frontmatter["coddoc"] == "2"
     assert "orçamento" in frontmatter["summary"].lower()
+    assert frontmatter["summary"].startswith("Orça a Receita")
 
-    full_content = "\n".join(content_lines)
     assert "GOVERNO DO ESTADO DE RONDÔNIA" in full_content
     assert "1981" in full_content
 
@@ -7,16 +7,12 @@ are also re-validated to ensure the checker doesn't false-positive.
 
 from __future__ import annotations
 
-import sys
 from pathlib import Path
 
+import check_schema_consistency as csc
 import pytest
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
-sys.path.insert(0, str(REPO_ROOT / "scripts"))
-
-import check_schema_consistency as csc  # noqa: E402
-
 
 FIXTURES = REPO_ROOT / "tests" / "fixtures" / "leizilla_xml"
 
@@ -1,5 +1,10 @@
 """Testes para leizilla.storage."""
 
+import hashlib
+import json
+from datetime import date, datetime, timedelta
+
+import duckdb
 import pytest
 
 from leizilla import storage
@@ -13,10 +18,12 @@ def temp_db(tmp_path):
     db.close()
 
 
-def test_create_schema(temp_db):
+@pytest.mark.parametrize("table", ["leis", "discovered_resources"])
+def test_create_schema(temp_db, table):
     conn = temp_db.connect()
     result = conn.execute(
-        "SELECT table_name FROM information_schema.tables WHERE table_name = 'leis'"
+        "SELECT table_name FROM information_schema.tables WHERE table_name = ?",
+        [table],
     ).fetchone()
     assert result is not None
 
@@ -55,8 +62,7 @@ def test_search_leis(temp_db):
             "tipo_lei": "decreto",
         },
     ]
-    for lei in leis:
-        temp_db.insert_lei(lei)
+    temp_db.insert_leis_bulk(leis)
 
     results = temp_db.search_leis(ente="ro")
     assert len(results) == 2
@@ -97,14 +103,6 @@ def test_get_stats(temp_db):
     assert stats["por_ente"]["federal"] == 1
 
 
-def test_create_schema_discovered_resources(temp_db):
-    conn = temp_db.connect()
-    result = conn.execute(
-        "SELECT table_name FROM information_schema.tables WHERE table_name = 'discovered_resources'"
-    ).fetchone()
-    assert result is not None
-
-
 def test_insert_and_get_pending_resources(temp_db):
     res_data = {
         "url": "http://ditel.casacivil.ro.gov.br/COTEL/Livros/Files/L5120.pdf",
@@ -189,3 +187,1118 @@ def test_get_leis_pending_ocr(temp_db):
     temp_db.update_lei("ro-casacivil-lei-05120", {"texto_completo": "conteudo da lei"})
     pending = temp_db.get_leis_pending_ocr("ro")
     assert len(pending) == 0
+
+
+def test_connect_gives_each_worker_thread_its_own_cursor(temp_db):
+    from concurrent.futures import ThreadPoolExecutor
+
+    temp_db.insert_lei({"id": "ro-lei-2024-001", "titulo": "Lei 1", "ente": "ro"})
+    root = temp_db.connect()
+
+    def worker(_):
+        conn = temp_db.connect()
+        assert conn is temp_db.connect()  # reaproveitado dentro da thread
+        return conn, temp_db.get_lei("ro-lei-2024-001")["titulo"]
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(worker, range(8)))
+
+    assert all(conn is not root for conn, _ in results)
+    assert {titulo for _, titulo in results} == {"Lei 1"}
+
+
+def test_concurrent_writers_do_not_conflict(temp_db):
+    import threading
+
+    temp_db.insert_lei({"id": "ro-lei-0", "titulo": "Lei 0", "ente": "ro"})
+    errors: list = []
+
+    def writer(n: int) -> None:
+        try:
+            for i in range(20):
+                with temp_db.transaction():
+                    temp_db.update_lei("ro-lei-0", {"titulo": f"Lei 0 ({n}.{i})"})
+                    temp_db.insert_lei(
+                        {"id": f"ro-lei-{n}-{i}", "titulo": "Lei", "ente": "ro"}
+                    )
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=writer, args=(n,)) for n in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
+    assert temp_db.get_stats()["total_leis"] == 1 + 4 * 20
+
+
+def test_search_leis_texto_uses_fts_index(temp_db):
+    if not temp_db._fts_ready():
+        pytest.skip("extensão DuckDB fts indisponível neste ambiente")
+    temp_db.insert_lei(
+        {
+            "id": "ro-lei-2024-001",
+            "titulo": "Lei Orçamentária",
+            "ente": "ro",
+            "texto_normalizado": "orca a receita e fixa a despesa do orcamento",
+        }
+    )
+    temp_db.insert_lei(
+        {
+            "id": "ro-lei-2024-002",
+            "titulo": "Lei Ambiental",
+            "ente": "ro",
+            "texto_normalizado": "dispoe sobre florestas",
+        }
+    )
+
+    # Acentos e flexões são normalizados pelo índice (strip_accents + stemmer).
+    results = temp_db.search_leis(texto="orçamentos")
+    assert [r["id"] for r in results] == ["ro-lei-2024-001"]
+    # O título também é indexado e buscado.
+    assert [r["id"] for r in temp_db.search_leis(texto="ambiental")] == [
+        "ro-lei-2024-002"
+    ]
+
+    # Escritas posteriores invalidam o snapshot do índice.
+    temp_db.update_lei("ro-lei-2024-002", {"texto_normalizado": "orcamento verde"})
+    ids = {r["id"] for r in temp_db.search_leis(texto="orcamento")}
+    assert ids == {"ro-lei-2024-001", "ro-lei-2024-002"}
+
+
+def test_fts_search_follows_writes_to_indexed_columns(temp_db):
+    if not temp_db._fts_ready():
+        pytest.skip("extensão DuckDB fts indisponível neste ambiente")
+    leis = [
+        {
+            "id": f"ro-lei-{n}",
+            "titulo": f"Lei {n}",
+            "ente": "ro",
+            "texto_normalizado": "orcamento",
+        }
+        for n in range(3)
+    ]
+    temp_db.insert_leis_bulk(leis)
+    assert len(temp_db.search_leis(texto="orcamento")) == 3
+
+    # Re-harvest idêntico e mudança fora do índice: mesmos resultados.
+    temp_db.insert_leis_bulk(leis)
+    temp_db.update_lei("ro-lei-0", {"url_pdf_ia": "ia"})
+    assert len(temp_db.search_leis(texto="orcamento")) == 3
+
+    temp_db.update_lei("ro-lei-0", {"texto_normalizado": "florestas"})
+    assert len(temp_db.search_leis(texto="orcamento")) == 2
+    assert [r["id"] for r in temp_db.search_leis(texto="florestas")] == ["ro-lei-0"]
+    temp_db.insert_lei(
+        {
+            "id": "ro-lei-9",
+            "titulo": "Lei 9",
+            "ente": "ro",
+            "texto_normalizado": "orcamento",
+        }
+    )
+    assert len(temp_db.search_leis(texto="orcamento")) == 3
+
+
+def test_search_leis_ranks_titulo_and_texto(temp_db):
+    if not temp_db._fts_ready():
+        pytest.skip("extensão DuckDB fts indisponível neste ambiente")
+    temp_db.insert_leis_bulk(
+        [
+            {
+                "id": "ro-lei-1",
+                "titulo": "Lei do Orçamento",
+                "ente": "ro",
+                "texto_normalizado": "estima a receita e fixa o orcamento do estado",
+            },
+            {
+                "id": "ro-lei-2",
+                "titulo": "Lei Ambiental",
+                "ente": "ro",
+                "texto_normalizado": "cita o orcamento uma vez",
+            },
+            {"id": "ro-lei-3", "titulo": "Lei Viária", "ente": "ro"},
+        ]
+    )
+    # Título e texto pontuam juntos: melhor score primeiro.
+    results = temp_db.search_leis(texto="orçamento")
+    assert [r["id"] for r in results] == ["ro-lei-1", "ro-lei-2"]
+
+
+def test_percent_in_query_is_a_like_pattern(temp_db):
+    temp_db.insert_leis_bulk(
+        [
+            {
+                "id": "ro-lei-1",
+                "titulo": "Lei 1",
+                "ente": "ro",
+                "texto_normalizado": "dispoe sobre o orcamento",
+            },
+            {
+                "id": "ro-lei-2",
+                "titulo": "Lei 2",
+                "ente": "ro",
+                "texto_normalizado": "orcamento do estado",
+            },
+        ]
+    )
+    assert [r["id"] for r in temp_db.search_leis(texto="orcamento%")] == ["ro-lei-2"]
+    assert [r["id"] for r in temp_db.search_leis(texto="%sobre%")] == ["ro-lei-1"]
+
+
+@pytest.mark.parametrize(
+    "texto, esperado",
+    [
+        ("orcamento", ("contains", "orcamento")),
+        ("%orcamento%", ("contains", "orcamento")),
+        ("orcamento%", ("starts_with", "orcamento")),
+        ("%estado", ("ends_with", "estado")),
+        ("or%mento", ("like", "or%mento")),
+        ("%orc_mento%", ("like", "%orc_mento%")),
+        ("%%", ("like", "%%")),
+        ("Orçamento", ("contains", "orcamento")),
+        ("Orçamento do %", ("starts_with", "orcamento do ")),
+        ("%Lei_Orçamentária%", ("like", "%lei_orcamentaria%")),
+    ],
+)
+def test_text_predicate_shape(texto, esperado):
+    assert storage._text_predicate(texto) == esperado
+
+
+def test_accented_search_matches_without_fts(temp_db, monkeypatch):
+    # Sem a extensão `fts` (offline) a busca vai direto a texto_normalizado.
+    monkeypatch.setattr(storage.DuckDBStorage, "_fts_ready", lambda self: False)
+    temp_db.insert_lei(
+        {
+            "id": "ro-lei-1",
+            "titulo": "Lei Orçamentária",
+            "ente": "ro",
+            "texto_completo": "Estima a receita e fixa a despesa do Orçamento.",
+        }
+    )
+
+    for texto in ("orçamento", "ORÇAMENTO", "%Orçamento.", "%despesa do orç%"):
+        assert [r["id"] for r in temp_db.search_leis(texto=texto)] == ["ro-lei-1"]
+    assert temp_db.snapshot(["Orçamento", "tributário", "Receita"])["hits"] == {
+        "Orçamento": ["ro-lei-1"],
+        "tributário": [],
+        "Receita": ["ro-lei-1"],
+    }
+
+
+def test_wildcard_patterns_match_like_semantics(temp_db):
+    temp_db.insert_leis_bulk(
+        [
+            {
+                "id": "ro-lei-1",
+                "titulo": "Lei 1",
+                "ente": "ro",
+                "texto_normalizado": "orcamento do estado",
+            },
+            {
+                "id": "ro-lei-2",
+                "titulo": "Lei 2",
+                "ente": "ro",
+                "texto_normalizado": "estado e orcamento",
+            },
+        ]
+    )
+
+    def ids(texto):
+        return sorted(r["id"] for r in temp_db.search_leis(texto=texto))
+
+    assert ids("orcamento%") == ["ro-lei-1"]
+    assert ids("%orcamento") == ["ro-lei-2"]
+    assert ids("%orcamento%") == ["ro-lei-1", "ro-lei-2"]
+    assert ids("estado%orcamento") == ["ro-lei-2"]
+
+
+def test_search_leis_combines_filters_in_every_mode(temp_db):
+    temp_db.insert_leis_bulk(
+        [
+            {
+                "id": f"{ente}-lei-{ano}",
+                "titulo": f"Lei {ano}",
+                "ente": ente,
+                "ano": ano,
+                "texto_normalizado": "fixa o orcamento",
+            }
+            for ente in ("ro", "ac")
+            for ano in (2023, 2024)
+        ]
+    )
+    for texto in ("orcamento", "%orcamento", None):
+        results = temp_db.search_leis(ente="ro", ano=2024, texto=texto)
+        assert [r["id"] for r in results] == ["ro-lei-2024"], texto
+
+
+def test_repeated_single_row_writes_of_one_shape(temp_db):
+    for i in range(3):
+        temp_db.insert_lei(
+            {"id": f"ro-lei-{i}", "titulo": f"Lei {i}", "ente": "ro", "ano": 2024}
+        )
+        temp_db.update_lei(f"ro-lei-{i}", {"titulo": f"Lei {i} revista"})
+    temp_db.insert_lei(
+        {"id": "ro-lei-0", "titulo": "Lei 0 nova", "ente": "ro", "ano": 2024}
+    )
+
+    assert temp_db.get_lei("ro-lei-0")["titulo"] == "Lei 0 nova"
+    assert temp_db.get_lei("ro-lei-1")["titulo"] == "Lei 1 revista"
+    assert temp_db.get_lei("ro-lei-2")["titulo"] == "Lei 2 revista"
+
+
+def test_snapshot_term_hits_single_pass(temp_db):
+    temp_db.insert_leis_bulk(
+        [
+            {
+                "id": "ro-lei-1",
+                "titulo": "Lei 1",
+                "ente": "ro",
+                "texto_normalizado": "orcamento do estado",
+            },
+            {
+                "id": "ro-lei-2",
+                "titulo": "Lei 2",
+                "ente": "ro",
+                "texto_normalizado": "estado e municipios",
+            },
+        ]
+    )
+    assert temp_db.snapshot(["estado", "orcamento", "50%"])["hits"] == {
+        "estado": ["ro-lei-1", "ro-lei-2"],
+        "orcamento": ["ro-lei-1"],
+        "50%": [],
+    }
+    assert temp_db.snapshot()["hits"] == {}
+
+
+def test_insert_lei_serializes_metadados_compact_utf8(temp_db):
+    import datetime
+    import json
+
+    metadados = {
+        "ementa": "Orça a Receita",
+        "publicado_em": datetime.date(1981, 12, 31),
+    }
+    temp_db.insert_lei(
+        {
+            "id": "ro-lei-1981-002",
+            "titulo": "DL 2",
+            "ente": "ro",
+            "metadados": metadados,
+        }
+    )
+    raw = temp_db.get_lei("ro-lei-1981-002")["metadados"]
+    assert raw == '{"ementa":"Orça a Receita","publicado_em":"1981-12-31"}'
+    assert json.loads(raw)["ementa"] == "Orça a Receita"
+
+
+def test_insert_leis_bulk_metadados_json_cast(temp_db):
+    leis = [
+        {
+            "id": f"ro-lei-{n}",
+            "titulo": f"Lei {n}",
+            "ente": "ro",
+            "metadados": {"ementa": "Orça", "publicado_em": date(1981, 12, n + 1)},
+        }
+        for n in range(2)
+    ]
+    # Texto JSON do chamador grava igual ao objeto.
+    leis.append(
+        {
+            "id": "ro-lei-9",
+            "titulo": "Lei 9",
+            "ente": "ro",
+            "metadados": '{"a": [1, 2]}',
+        }
+    )
+    first = datetime(2026, 7, 1)
+    temp_db.insert_leis_bulk(leis, now=first)
+    assert (
+        temp_db.get_lei("ro-lei-1")["metadados"]
+        == '{"ementa":"Orça","publicado_em":"1981-12-02"}'
+    )
+    assert temp_db.get_lei("ro-lei-9")["metadados"] == '{"a":[1,2]}'
+
+    # Mesmo conteúdo de novo: nada muda, nem o updated_at.
+    temp_db.insert_leis_bulk(leis, now=datetime(2026, 8, 1))
+    assert temp_db.get_lei("ro-lei-1")["updated_at"] == first
+    assert temp_db.get_lei("ro-lei-9")["updated_at"] == first
+
+
+def test_update_resource_status_preserves_existing_snapshot(temp_db):
+    url = "http://ditel.casacivil.ro.gov.br/COTEL/Livros/Files/L5120.pdf"
+    snapshot = f"https://web.archive.org/web/20260523/{url}"
+    temp_db.insert_resource(
+        {"url": url, "ente": "ro", "fonte": "casacivil", "chave": "L5120"}
+    )
+    temp_db.update_resource_status(url, "downloaded", snapshot)
+    temp_db.update_resource_status(url, "failed")
+
+    row = (
+        temp_db.connect()
+        .execute(
+            "SELECT status, wayback_snapshot, ultima_tentativa "
+            "FROM discovered_resources WHERE url = ?",
+            [url],
+        )
+        .fetchone()
+    )
+    assert row[0] == "failed"
+    assert row[1] == snapshot
+    assert row[2] is not None
+
+
+def test_get_stats_por_ano_top_10_desc(temp_db):
+    temp_db.insert_leis_bulk(
+        [
+            {"id": f"ro-lei-{ano}", "titulo": f"Lei {ano}", "ente": "ro", "ano": ano}
+            for ano in range(2010, 2024)
+        ]
+    )
+    temp_db.insert_lei({"id": "ro-lei-sem-ano", "titulo": "Lei", "ente": "ro"})
+
+    stats = temp_db.get_stats()
+    assert stats["total_leis"] == 15
+    assert stats["por_ente"] == {"ro": 15}
+    assert list(stats["por_ano"]) == list(range(2023, 2013, -1))
+
+
+def test_snapshot_counts_and_term_hits_in_one_pass(temp_db):
+    temp_db.insert_leis_bulk(
+        [
+            {
+                "id": "ro-lei-2",
+                "titulo": "Lei 2",
+                "ente": "ro",
+                "ano": 2020,
+                "texto_normalizado": "orcamento do estado",
+            },
+            {
+                "id": "ro-lei-1",
+                "titulo": "Lei 1",
+                "ente": "ro",
+                "ano": 2021,
+                "texto_normalizado": "orcamento",
+            },
+            {
+                "id": "sp-lei-1",
+                "titulo": "Lei SP",
+                "ente": "sp",
+                "texto_normalizado": "estado",
+            },
+        ]
+    )
+    snap = temp_db.snapshot(["orcamento", "estado", "florestas"])
+    assert snap == {
+        "total_leis": 3,
+        "por_ente": {"ro": 2, "sp": 1},
+        "por_ano": {2021: 1, 2020: 1},
+        "hits": {
+            "orcamento": ["ro-lei-1", "ro-lei-2"],
+            "estado": ["ro-lei-2", "sp-lei-1"],
+            "florestas": [],
+        },
+    }
+    assert temp_db.snapshot()["hits"] == {}
+    assert list(temp_db.snapshot()["por_ano"]) == [2021, 2020]
+
+
+def test_get_stats_empty(temp_db):
+    assert temp_db.get_stats() == {"total_leis": 0, "por_ente": {}, "por_ano": {}}
+
+
+def test_insert_lei_existing_id_updates_only_changed_columns(temp_db):
+    temp_db.insert_lei(
+        {
+            "id": "ro-casacivil-lei-05120",
+            "titulo": "Lei 5120",
+            "ente": "ro",
+            "ano": 2021,
+            "texto_completo": "conteudo da lei",
+        }
+    )
+    first = temp_db.get_lei("ro-casacivil-lei-05120")
+
+    # Sem mudança: nenhuma escrita (updated_at intacto).
+    temp_db.insert_lei(
+        {"id": "ro-casacivil-lei-05120", "titulo": "Lei 5120", "ente": "ro"}
+    )
+    assert (
+        temp_db.get_lei("ro-casacivil-lei-05120")["updated_at"] == first["updated_at"]
+    )
+
+    # Re-harvest parcial: só url_pdf_ia muda; o resto da linha é preservado.
+    # (`now` explícito: CURRENT_TIMESTAMP tem resolução de milissegundo.)
+    temp_db.insert_lei(
+        {
+            "id": "ro-casacivil-lei-05120",
+            "titulo": "Lei 5120",
+            "ente": "ro",
+            "url_pdf_ia": "https://archive.org/download/x/L5120.pdf",
+        },
+        now=first["updated_at"] + timedelta(seconds=1),
+    )
+    lei = temp_db.get_lei("ro-casacivil-lei-05120")
+    assert lei["url_pdf_ia"] == "https://archive.org/download/x/L5120.pdf"
+    assert lei["texto_completo"] == "conteudo da lei"
+    assert lei["hash_conteudo"] == first["hash_conteudo"]
+    assert lei["ano"] == 2021
+    assert lei["updated_at"] > first["updated_at"]
+
+
+def test_reinserting_identical_typed_values_writes_nothing(temp_db):
+    leis = [
+        {
+            "id": f"ro-lei-{n}",
+            "titulo": f"Lei {n}",
+            "ente": "ro",
+            "ano": 2020,
+            "data_publicacao": "2020-01-02",
+            "created_at": "2020-01-02 03:04:05",
+            "metadados": {"orgao": "Assembléia"},
+        }
+        for n in range(2)
+    ]
+    carga = datetime(2026, 1, 1)
+    temp_db.insert_leis_bulk(leis, now=carga)
+
+    # Re-harvest idêntico, pelo caminho de lote e pelo de uma linha.
+    temp_db.insert_leis_bulk(leis, now=carga + timedelta(days=1))
+    temp_db.insert_lei(leis[0], now=carga + timedelta(days=2))
+
+    for n in range(2):
+        assert temp_db.get_lei(f"ro-lei-{n}")["updated_at"] == carga
+
+
+def test_batch_timestamp_is_shared_and_caller_dict_untouched(temp_db):
+    batch_ts = datetime(2026, 7, 1, 12, 0, 0)
+    for n in range(3):
+        temp_db.insert_lei(
+            {"id": f"ro-lei-{n}", "titulo": f"Lei {n}", "ente": "ro"}, now=batch_ts
+        )
+    assert {temp_db.get_lei(f"ro-lei-{n}")["updated_at"] for n in range(3)} == {
+        batch_ts
+    }
+
+    updates = {"titulo": "Lei 0 (consolidada)"}
+    temp_db.update_lei("ro-lei-0", updates)
+    assert updates == {"titulo": "Lei 0 (consolidada)"}
+    assert temp_db.get_lei("ro-lei-0")["updated_at"] > batch_ts
+
+
+def test_default_timestamp_comes_from_duckdb(temp_db, monkeypatch):
+    class _SemRelogio(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            raise AssertionError("updated_at deveria vir do CURRENT_TIMESTAMP")
+
+    monkeypatch.setattr(storage, "datetime", _SemRelogio)
+    leis = [{"id": f"ro-lei-{n}", "titulo": f"Lei {n}", "ente": "ro"} for n in range(3)]
+    temp_db.insert_leis_bulk(leis)
+    temp_db.insert_lei({"id": "ro-lei-9", "titulo": "Lei 9", "ente": "ro"})
+    temp_db.update_lei("ro-lei-0", {"titulo": "Lei 0 (consolidada)"})
+    carimbos = {temp_db.get_lei(lei["id"])["updated_at"] for lei in leis[1:]}
+    assert len(carimbos) == 1 and None not in carimbos
+    assert temp_db.get_lei("ro-lei-9")["updated_at"] is not None
+    assert temp_db.get_lei("ro-lei-0")["updated_at"] >= carimbos.pop()
+
+
+def test_insert_leis_bulk_matches_insert_lei_semantics(temp_db):
+    temp_db.insert_lei(
+        {
+            "id": "ro-lei-0",
+            "titulo": "Lei 0",
+            "ente": "ro",
+            "texto_completo": "texto original",
+        }
+    )
+    batch_ts = datetime(2026, 7, 1, 12, 0, 0)
+    temp_db.insert_leis_bulk(
+        [
+            {"id": "ro-lei-0", "titulo": "Lei 0", "ente": "ro", "url_pdf_ia": "ia"},
+            {"id": "ro-lei-1", "titulo": "Lei 1", "ente": "ro", "ano": 2021},
+            {
+                "id": "ro-lei-2",
+                "titulo": "Lei 2",
+                "ente": "ro",
+                "data_publicacao": date(2022, 3, 4),
+                "metadados": {"orgao": "Assembléia"},
+            },
+            {"id": "ro-lei-1", "titulo": "Lei 1 (consolidada)", "ente": "ro"},
+        ],
+        now=batch_ts,
+    )
+
+    existente = temp_db.get_lei("ro-lei-0")
+    assert existente["url_pdf_ia"] == "ia"
+    assert existente["texto_completo"] == "texto original"
+    assert existente["updated_at"] == batch_ts
+
+    # Id repetido no lote: chamadas sucessivas, a última vence.
+    lei1 = temp_db.get_lei("ro-lei-1")
+    assert lei1["titulo"] == "Lei 1 (consolidada)"
+    assert lei1["ano"] == 2021
+    assert lei1["status"] == "ativo"
+
+    lei2 = temp_db.get_lei("ro-lei-2")
+    assert lei2["data_publicacao"] == date(2022, 3, 4)
+    assert lei2["metadados"] == '{"orgao":"Assembléia"}'
+    assert lei2["updated_at"] == batch_ts
+
+
+def test_insert_leis_bulk_updates_existing_rows_in_one_statement(temp_db, monkeypatch):
+    carga = datetime(2026, 1, 1)
+    leis = [
+        {
+            "id": f"ro-lei-{n}",
+            "titulo": f"Lei {n}",
+            "ente": "ro",
+            "ano": 2020,
+            "texto_normalizado": "texto",
+        }
+        for n in range(5)
+    ]
+    temp_db.insert_leis_bulk(leis[:4], now=carga)
+
+    def _por_linha(*args, **kwargs):
+        raise AssertionError("re-harvest em lote não deveria ir linha a linha")
+
+    monkeypatch.setattr(storage.DuckDBStorage, "update_lei", _por_linha)
+    reharvest = datetime(2026, 2, 1)
+    temp_db.insert_leis_bulk(
+        [
+            {**leis[0], "texto_normalizado": "fixa o orcamento"},
+            {**leis[1], "ano": 2021},
+            leis[2],
+            leis[4],
+        ],
+        now=reharvest,
+    )
+
+    assert temp_db.get_lei("ro-lei-0")["texto_normalizado"] == "fixa o orcamento"
+    assert temp_db.get_lei("ro-lei-1")["ano"] == 2021
+    assert [temp_db.get_lei(f"ro-lei-{n}")["updated_at"] for n in range(5)] == [
+        reharvest,
+        reharvest,
+        carga,
+        carga,
+        reharvest,
+    ]
+    # A mudança em coluna indexada chega à busca textual.
+    assert [r["id"] for r in temp_db.search_leis(texto="orcamento")] == ["ro-lei-0"]
+
+
+def test_ingest_jsonl_loads_file_in_sql(temp_db, tmp_path):
+    temp_db.insert_lei(
+        {"id": "ro-lei-0", "titulo": "Lei 0", "ente": "ro", "url_pdf_ia": "ia"},
+        now=datetime(2026, 1, 1),
+    )
+    temp_db.insert_lei(
+        {"id": "ro-lei-1", "titulo": "Lei 1", "ente": "ro"}, now=datetime(2026, 1, 1)
+    )
+    linhas = [
+        {"id": "ro-lei-0", "titulo": "Lei 0", "ente": "ro"},
+        {"id": "ro-lei-1", "titulo": "Lei 1 (consolidada)", "ente": "ro"},
+        {
+            "id": "ro-lei-2",
+            "titulo": "Lei 2",
+            "ente": "ro",
+            "data_publicacao": "2022-03-04",
+            "texto_completo": "Orça a Receita",
+            "metadados": {"orgao": "Assembléia"},
+        },
+    ]
+    path = tmp_path / "leis.jsonl"
+    path.write_text(
+        "".join(json.dumps(linha) + "\n" for linha in linhas), encoding="utf-8"
+    )
+    ingest_ts = datetime(2026, 7, 1)
+
+    assert temp_db.ingest_jsonl(path, now=ingest_ts) == 3
+
+    inalterada = temp_db.get_lei("ro-lei-0")
+    assert inalterada["url_pdf_ia"] == "ia"
+    assert inalterada["updated_at"] == datetime(2026, 1, 1)
+    assert temp_db.get_lei("ro-lei-1")["titulo"] == "Lei 1 (consolidada)"
+    assert temp_db.get_lei("ro-lei-1")["updated_at"] == ingest_ts
+    nova = temp_db.get_lei("ro-lei-2")
+    assert nova["data_publicacao"] == date(2022, 3, 4)
+    assert nova["metadados"] == '{"orgao":"Assembléia"}'
+    assert (
+        nova["hash_conteudo"] == hashlib.sha256("Orça a Receita".encode()).hexdigest()
+    )
+    assert nova["status"] == "ativo"
+
+
+def test_ingest_jsonl_keeps_columns_a_line_does_not_carry(temp_db, tmp_path):
+    temp_db.insert_lei(
+        {
+            "id": "ro-lei-1",
+            "titulo": "Lei 1",
+            "ente": "ro",
+            "texto_completo": "Texto original",
+            "url_pdf_ia": "ia",
+        }
+    )
+    linhas = [
+        {"id": "ro-lei-1", "titulo": "Lei 1 (consolidada)"},
+        {
+            "id": "ro-lei-2",
+            "titulo": "Lei 2",
+            "ente": "ro",
+            "texto_completo": "Fixa o Orçamento",
+            "url_pdf_ia": "ia-2",
+        },
+    ]
+    path = tmp_path / "leis.jsonl"
+    path.write_text("".join(json.dumps(linha) + "\n" for linha in linhas))
+
+    assert temp_db.ingest_jsonl(path) == 2
+
+    antiga = temp_db.get_lei("ro-lei-1")
+    assert antiga["titulo"] == "Lei 1 (consolidada)"
+    assert antiga["texto_completo"] == "Texto original"
+    assert antiga["url_pdf_ia"] == "ia"
+    nova = temp_db.get_lei("ro-lei-2")
+    assert nova["texto_normalizado"] == "fixa o orcamento"
+    assert nova["status"] == "ativo"
+    assert [r["id"] for r in temp_db.search_leis(texto="orcamento")] == ["ro-lei-2"]
+
+
+def test_ingest_jsonl_reads_keys_past_any_sample(temp_db, tmp_path):
+    path = tmp_path / "leis.jsonl"
+    with path.open("w") as f:
+        for n in range(25_000):
+            f.write(json.dumps({"id": f"ro-lei-{n}", "titulo": "Lei", "ente": "ro"}))
+            f.write("\n")
+        f.write(
+            json.dumps(
+                {"id": "ro-lei-tardia", "titulo": "Lei", "ente": "ro", "ano": 2024}
+            )
+            + "\n"
+        )
+
+    assert temp_db.ingest_jsonl(path) == 25_001
+    assert temp_db.get_lei("ro-lei-tardia")["ano"] == 2024
+
+
+def test_ingest_jsonl_empty_file(temp_db, tmp_path):
+    path = tmp_path / "vazio.jsonl"
+    path.write_text("")
+    assert temp_db.ingest_jsonl(path) == 0
+    assert temp_db.get_stats()["total_leis"] == 0
+
+
+def test_ingest_jsonl_rejects_unknown_columns(temp_db, tmp_path):
+    path = tmp_path / "leis.jsonl"
+    path.write_text('{"id": "ro-lei-1", "nao_existe": 1}\n', encoding="utf-8")
+    with pytest.raises(ValueError, match="nao_existe"):
+        temp_db.ingest_jsonl(path)
+
+
+def test_ingest_jsonl_rejects_repeated_ids(temp_db, tmp_path):
+    path = tmp_path / "leis.jsonl"
+    path.write_text(
+        '{"id": "ro-lei-1", "titulo": "Lei 1", "ente": "ro"}\n'
+        '{"id": "ro-lei-1", "titulo": "Lei 1 (consolidada)", "ente": "ro"}\n',
+        encoding="utf-8",
+    )
+    with pytest.raises(ValueError, match="ro-lei-1"):
+        temp_db.ingest_jsonl(path)
+    assert temp_db.get_lei("ro-lei-1") is None
+
+
+def test_ingest_jsonl_stores_metadados_like_insert_lei(temp_db, tmp_path):
+    carga = datetime(2026, 1, 1)
+    path = tmp_path / "leis.jsonl"
+    # Objeto aninhado e texto JSON com espaços: ambos gravados compactos.
+    path.write_text(
+        '{"id": "ro-lei-1", "titulo": "Lei 1", "ente": "ro", '
+        '"metadados": "{\\"x\\": 1}"}\n'
+        '{"id": "ro-lei-2", "titulo": "Lei 2", "ente": "ro", '
+        '"metadados": {"orgao": "Assembléia", "x": 1}}\n',
+        encoding="utf-8",
+    )
+    temp_db.ingest_jsonl(path, now=carga)
+    assert temp_db.get_lei("ro-lei-1")["metadados"] == '{"x":1}'
+    assert temp_db.get_lei("ro-lei-2")["metadados"] == '{"orgao":"Assembléia","x":1}'
+
+    temp_db.insert_lei(
+        {"id": "ro-lei-1", "titulo": "Lei 1", "ente": "ro", "metadados": {"x": 1}},
+        now=carga + timedelta(days=1),
+    )
+    assert temp_db.get_lei("ro-lei-1")["updated_at"] == carga
+
+
+def test_insert_derives_texto_normalizado_when_missing(temp_db):
+    temp_db.insert_leis_bulk(
+        [
+            {
+                "id": "ro-lei-1",
+                "titulo": "Lei 1",
+                "ente": "ro",
+                "texto_completo": "Orça a Receita do Estado de Rondônia.",
+            },
+            {
+                "id": "ro-lei-2",
+                "titulo": "Lei 2",
+                "ente": "ro",
+                "texto_completo": "Texto bruto",
+                "texto_normalizado": "ja normalizado",
+            },
+        ]
+    )
+    assert (
+        temp_db.get_lei("ro-lei-1")["texto_normalizado"]
+        == "orca a receita do estado de rondonia"
+    )
+    assert temp_db.get_lei("ro-lei-2")["texto_normalizado"] == "ja normalizado"
+
+    temp_db.update_lei("ro-lei-1", {"texto_normalizado": None})
+    temp_db.insert_lei(
+        {"id": "ro-lei-1", "titulo": "Lei 1", "ente": "ro", "texto_completo": "Nova"}
+    )
+    assert temp_db.get_lei("ro-lei-1")["texto_normalizado"] == "nova"
+
+
+def test_insert_leis_bulk_loads_in_chunks(temp_db):
+    leis = [{"id": f"ro-lei-{n}", "titulo": f"Lei {n}", "ente": "ro"} for n in range(5)]
+    temp_db.insert_leis_bulk(leis, chunk_size=2)
+    assert temp_db.get_stats()["total_leis"] == 5
+    assert len({temp_db.get_lei(lei["id"])["updated_at"] for lei in leis}) == 1
+
+
+def test_insert_leis_bulk_hashes_texts_in_pool(temp_db, monkeypatch):
+    monkeypatch.setattr(storage, "_HASH_POOL_MIN_CHARS", 0)
+    monkeypatch.setattr(storage.os, "cpu_count", lambda: 4)
+    leis = [
+        {"id": f"ro-lei-{n}", "titulo": f"Lei {n}", "ente": "ro"}
+        | ({"texto_completo": f"Art. 1º Texto {n}"} if n % 2 else {})
+        for n in range(6)
+    ]
+    temp_db.insert_leis_bulk(leis)
+    for lei in leis:
+        texto = lei.get("texto_completo")
+        expected = hashlib.sha256(texto.encode("utf-8")).hexdigest() if texto else None
+        assert temp_db.get_lei(lei["id"])["hash_conteudo"] == expected
+
+
+def test_insert_leis_bulk_is_atomic(temp_db):
+    with pytest.raises(duckdb.ConstraintException):
+        temp_db.insert_leis_bulk(
+            [
+                {"id": "ro-lei-1", "titulo": "Lei 1", "ente": "ro"},
+                {"id": "ro-lei-2", "titulo": None, "ente": "ro"},
+            ]
+        )
+    assert temp_db.get_lei("ro-lei-1") is None
+    # A conexão segue utilizável após o rollback.
+    temp_db.insert_leis_bulk([{"id": "ro-lei-1", "titulo": "Lei 1", "ente": "ro"}])
+    assert temp_db.get_lei("ro-lei-1") is not None
+
+
+def test_transaction_commits_once_and_rolls_back_on_error(temp_db):
+    with temp_db.transaction():
+        for n in range(3):
+            temp_db.insert_lei(
+                {"id": f"ro-lei-{n}", "titulo": f"Lei {n}", "ente": "ro"}
+            )
+    assert temp_db.get_stats()["total_leis"] == 3
+
+    with pytest.raises(RuntimeError):
+        with temp_db.transaction():
+            temp_db.insert_lei({"id": "ro-lei-9", "titulo": "Lei 9", "ente": "ro"})
+            temp_db.update_lei("ro-lei-0", {"titulo": "Lei 0 alterada"})
+            raise RuntimeError("falha no meio do lote")
+    assert temp_db.get_lei("ro-lei-9") is None
+    assert temp_db.get_lei("ro-lei-0")["titulo"] == "Lei 0"
+
+    # Depois do rollback, escritas voltam ao autocommit normal.
+    temp_db.insert_lei({"id": "ro-lei-9", "titulo": "Lei 9", "ente": "ro"})
+    assert temp_db.get_lei("ro-lei-9") is not None
+
+
+def test_rollback_discards_fts_rebuild_made_inside_transaction(temp_db):
+    if not temp_db._fts_ready():
+        pytest.skip("extensão DuckDB fts indisponível neste ambiente")
+    temp_db.insert_lei(
+        {
+            "id": "ro-lei-1",
+            "titulo": "Lei 1",
+            "ente": "ro",
+            "texto_normalizado": "orcamento",
+        }
+    )
+    with pytest.raises(RuntimeError):
+        with temp_db.transaction():
+            temp_db.insert_lei(
+                {
+                    "id": "ro-lei-2",
+                    "titulo": "Lei 2",
+                    "ente": "ro",
+                    "texto_normalizado": "orcamento",
+                }
+            )
+            assert len(temp_db.search_leis(texto="orcamento")) == 2
+            raise RuntimeError("desfaz o lote e o índice refeito nele")
+    assert [r["id"] for r in temp_db.search_leis(texto="orcamento")] == ["ro-lei-1"]
+
+
+def test_get_lei_lru_cache_serves_copies_and_invalidates_on_write(temp_db, monkeypatch):
+    monkeypatch.setattr(storage, "LEI_CACHE_SIZE", 2)
+    temp_db.insert_leis_bulk(
+        [{"id": f"ro-lei-{n}", "titulo": f"Lei {n}", "ente": "ro"} for n in range(3)]
+    )
+    lei = temp_db.get_lei("ro-lei-0")
+    lei["titulo"] = "alterado pelo chamador"
+    assert temp_db.get_lei("ro-lei-0")["titulo"] == "Lei 0"
+
+    temp_db.get_lei("ro-lei-1")
+    temp_db.get_lei("ro-lei-0")  # volta ao fim da fila
+    temp_db.get_lei("ro-lei-2")  # estoura o tamanho: sai o menos recente
+    # SQL direto, por fora da API: só quem saiu do cache enxerga a mudança.
+    temp_db.connect().execute("UPDATE leis SET titulo = titulo || ' (sql)'")
+    assert [temp_db.get_lei(f"ro-lei-{n}")["titulo"] for n in (0, 2, 1)] == [
+        "Lei 0",
+        "Lei 2",
+        "Lei 1 (sql)",
+    ]
+
+    temp_db.update_lei("ro-lei-0", {"titulo": "Lei 0 (consolidada)"})
+    # A escrita esvazia o cache: tudo volta do banco.
+    assert temp_db.get_lei("ro-lei-0")["titulo"] == "Lei 0 (consolidada)"
+    assert temp_db.get_lei("ro-lei-2")["titulo"] == "Lei 2 (sql)"
+    assert temp_db.get_lei("ro-lei-9") is None
+
+
+def test_get_lei_inside_transaction_sees_its_own_writes(temp_db):
+    temp_db.insert_lei({"id": "ro-lei-1", "titulo": "Lei 1", "ente": "ro"})
+    assert temp_db.get_lei("ro-lei-1")["titulo"] == "Lei 1"
+    with temp_db.transaction():
+        temp_db.update_lei("ro-lei-1", {"titulo": "Lei 1 (consolidada)"})
+        assert temp_db.get_lei("ro-lei-1")["titulo"] == "Lei 1 (consolidada)"
+    assert temp_db.get_lei("ro-lei-1")["titulo"] == "Lei 1 (consolidada)"
+
+
+def test_read_only_storage_reads_alongside_other_readers(tmp_path):
+    db_path = tmp_path / "test.duckdb"
+    writer = storage.DuckDBStorage(db_path)
+    writer.insert_lei(
+        {
+            "id": "ro-lei-2024-001",
+            "titulo": "Lei Orçamentária",
+            "ente": "ro",
+            "ano": 2024,
+            "texto_normalizado": "orcamento anual",
+        }
+    )
+    writer.close()
+
+    reader = storage.DuckDBStorage(db_path, read_only=True)
+    try:
+        assert reader.get_stats()["total_leis"] == 1
+        assert [r["id"] for r in reader.search_leis(texto="orcamento")] == [
+            "ro-lei-2024-001"
+        ]
+        with pytest.raises(duckdb.Error):
+            reader.update_lei("ro-lei-2024-001", {"ano": 2025})
+    finally:
+        reader.close()
+
+
+def test_read_only_storage_uses_index_only_while_current(tmp_path):
+    db_path = tmp_path / "test.duckdb"
+    writer = storage.DuckDBStorage(db_path)
+    if not writer._fts_ready():
+        pytest.skip("extensão DuckDB fts indisponível neste ambiente")
+    lei = {"id": "ro-lei-1", "titulo": "Lei Orçamentária", "ente": "ro"}
+    writer.insert_lei({**lei, "texto_normalizado": "fixa o orcamento"})
+    writer.search_leis(texto="orcamento")  # refaz o índice no arquivo
+    writer.close()
+
+    def busca_ro(texto):
+        reader = storage.DuckDBStorage(db_path, read_only=True)
+        try:
+            return [r["id"] for r in reader.search_leis(texto=texto)]
+        finally:
+            reader.close()
+
+    # BM25 (stemmer): o plural casa com o singular gravado.
+    assert busca_ro("orçamentos") == ["ro-lei-1"]
+
+    writer = storage.DuckDBStorage(db_path)
+    writer.insert_lei({**lei, "id": "ro-lei-2", "texto_normalizado": "orcamento"})
+    writer.close()
+    # Índice velho: read-only não o usa e cai no filtro por substring.
+    assert busca_ro("orçamentos") == []
+    assert sorted(busca_ro("orçamento")) == ["ro-lei-1", "ro-lei-2"]
+
+
+def test_read_only_storage_sees_write_stamped_in_the_past(tmp_path):
+    db_path = tmp_path / "test.duckdb"
+    writer = storage.DuckDBStorage(db_path)
+    if not writer._fts_ready():
+        pytest.skip("extensão DuckDB fts indisponível neste ambiente")
+    writer.insert_leis_bulk(
+        [
+            {
+                "id": "a",
+                "titulo": "Lei A",
+                "ente": "ro",
+                "texto_normalizado": "orcamento",
+            },
+            {
+                "id": "b",
+                "titulo": "Lei B",
+                "ente": "ro",
+                "texto_normalizado": "receita",
+            },
+        ],
+        now=datetime(2024, 6, 1),
+    )
+    writer.search_leis(texto="orcamento")  # refaz o índice no arquivo
+    # `now` anterior ao maior updated_at: nem linhas nem MAX(updated_at) mudam.
+    writer.update_lei(
+        "b", {"texto_normalizado": "orcamento verde"}, now=datetime(2024, 1, 1)
+    )
+    writer.close()
+
+    reader = storage.DuckDBStorage(db_path, read_only=True)
+    try:
+        assert sorted(r["id"] for r in reader.search_leis(texto="orcamento")) == [
+            "a",
+            "b",
+        ]
+    finally:
+        reader.close()
+
+
+def test_read_only_storage_creates_missing_database(tmp_path):
+    db = storage.DuckDBStorage(tmp_path / "novo.duckdb", read_only=True)
+    try:
+        assert db.search_leis(ente="ro") == []
+    finally:
+        db.close()
+
+
+def test_get_leis_pending_download_and_upload(temp_db):
+    temp_db.insert_lei(
+        {"id": "a", "titulo": "A", "ente": "ro", "url_original": "http://x/a.pdf"}
+    )
+    temp_db.insert_lei(
+        {
+            "id": "b",
+            "titulo": "B",
+            "ente": "ro",
+            "url_original": "http://x/b.pdf",
+            "local_pdf_path": "/tmp/b.pdf",
+        }
+    )
+    temp_db.insert_lei(
+        {
+            "id": "c",
+            "titulo": "C",
+            "ente": "ro",
+            "url_original": "http://x/c.pdf",
+            "local_pdf_path": "/tmp/c.pdf",
+            "url_pdf_ia": "https://archive.org/download/c/c.pdf",
+        }
+    )
+    temp_db.insert_lei({"id": "d", "titulo": "D", "ente": "ro"})
+
+    assert [r["id"] for r in temp_db.get_leis_pending_download("ro")] == ["a"]
+    assert [r["id"] for r in temp_db.get_leis_pending_upload()] == ["b"]
+    assert temp_db.get_leis_pending_download("sp") == []
+
+
+def test_touch_lei_sends_failed_item_to_back_of_queue(temp_db):
+    carga = datetime(2026, 1, 1)
+    temp_db.insert_leis_bulk(
+        [{"id": f"ro-lei-{n}", "titulo": f"Lei {n}", "ente": "ro"} for n in range(3)],
+        now=carga,
+    )
+    pendentes = [r["id"] for r in temp_db.get_leis_pending_ocr(limit=2)]
+    for n, lei_id in enumerate(pendentes):
+        temp_db.touch_lei(lei_id, now=carga + timedelta(minutes=n + 1))
+
+    (restante,) = {"ro-lei-0", "ro-lei-1", "ro-lei-2"} - set(pendentes)
+    assert [r["id"] for r in temp_db.get_leis_pending_ocr(limit=2)] == [
+        restante,
+        pendentes[0],
+    ]
+
+
+def test_connect_applies_duckdb_tuning(tmp_path, monkeypatch):
+    from leizilla import config
+
+    monkeypatch.setattr(config, "DUCKDB_THREADS", 2)
+    monkeypatch.setattr(config, "DUCKDB_MEMORY_LIMIT", "512MB")
+    db = storage.DuckDBStorage(tmp_path / "tuned.duckdb")
+    try:
+        conn = db.connect()
+        assert conn.execute("SELECT current_setting('threads')").fetchone()[0] == 2
+        temp_dir = conn.execute("SELECT current_setting('temp_directory')").fetchone()
+        assert temp_dir[0] == str(config.TEMP_DIR / "duckdb")
+    finally:
+        db.close()
+
+
+def test_export_parquet_uses_zstd(temp_db, tmp_path):
+    temp_db.insert_leis_bulk(
+        [
+            {"id": f"{ente}-lei-2024-001", "titulo": "Lei", "ente": ente, "ano": 2024}
+            for ente in ("ro", "sp")
+        ]
+    )
+    out = tmp_path / "leizilla-ro.parquet"
+    temp_db.export_parquet(out, ente="ro")
+
+    conn = duckdb.connect()
+    try:
+        assert conn.execute(
+            "SELECT count(*) FROM read_parquet(?)", [str(out)]
+        ).fetchone() == (1,)
+        codecs = conn.execute(
+            "SELECT DISTINCT compression FROM parquet_metadata(?)", [str(out)]
+        ).fetchall()
+        assert codecs == [("ZSTD",)]
+    finally:
+        conn.close()
+
+
+def test_export_parquet_path_is_not_interpolated_into_sql(temp_db, tmp_path):
+    temp_db.insert_lei({"id": "ro-lei-2024-001", "titulo": "Lei", "ente": "ro"})
+    out = tmp_path / "d'oeste.parquet"  # aspas quebrariam um TO '{path}'
+    temp_db.export_parquet(out)
+
+    conn = duckdb.connect()
+    try:
+        assert conn.execute(
+            "SELECT count(*) FROM read_parquet(?)", [str(out)]
+        ).fetchone() == (1,)
+    finally:
+        conn.close()
+
+
+def test_export_parquet_column_projection_and_codec(temp_db, tmp_path):
+    temp_db.insert_lei(
+        {"id": "ro-lei-1", "titulo": "Lei 1", "ente": "ro", "texto_completo": "x" * 100}
+    )
+    out = tmp_path / "leizilla-meta.parquet"
+    temp_db.export_parquet(out, columns=["id", "titulo"], compression="snappy")
+
+    conn = duckdb.connect()
+    try:
+        rel = conn.sql(f"SELECT * FROM read_parquet('{out}')")
+        assert rel.columns == ["id", "titulo"]
+        codecs = conn.execute(
+            "SELECT DISTINCT compression FROM parquet_metadata(?)", [str(out)]
+        ).fetchall()
+        assert codecs == [("SNAPPY",)]
+    finally:
+        conn.close()
+
+    with pytest.raises(ValueError):
+        temp_db.export_parquet(out, columns=["id; DROP TABLE leis"])